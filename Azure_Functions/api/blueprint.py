@@ -5,31 +5,33 @@
 # Please refer to https://aka.ms/azure-functions-python-blueprints
 
 
-import json
 import logging
 import os
 from datetime import datetime
+from typing import Callable
 
 import azure.functions as func
-
-from services import psycopg_sample, sqlalchemy_sample
+import orjson
 
 blueprint = func.Blueprint()
 
 
-def get_current_datetime() -> datetime:
+def _build_current_datetime_getter() -> Callable[[], datetime]:
     """
-    現在の日時を取得する
+    現在の日時を取得する関数を作成する
+
+    環境変数 TEST_DATETIME はワーカーの実行中に変わらないため、インポート時に1回だけ評価する。
 
     Returns:
-        datetime: 現在の日時
+        Callable[[], datetime]: 現在の日時を返す関数
     """
     for_test = os.getenv("TEST_DATETIME")
 
     if for_test:
         # テスト用の環境変数が設定されている場合は、その値を使用
         try:
-            return datetime.strptime(for_test, "%Y-%m-%d %H:%M:%S")
+            test_datetime = datetime.strptime(for_test, "%Y-%m-%d %H:%M:%S")
+            return lambda: test_datetime
         except ValueError as e:
             # raise ValueError("環境変数 TEST_DATETIME の値が日付フォーマットと一致しません。") from e
             logging.debug(
@@ -38,7 +40,11 @@ def get_current_datetime() -> datetime:
             )
 
     # 環境変数が設定されていない場合は、現在の日時を取得
-    return datetime.now()
+    return datetime.now
+
+
+get_current_datetime: Callable[[], datetime] = _build_current_datetime_getter()
+"""現在の日時を取得する (TEST_DATETIME が設定されている場合はその値)"""
 
 
 @blueprint.route(route="http_trigger", auth_level=func.AuthLevel.ANONYMOUS)
@@ -52,13 +58,15 @@ def http_trigger(req: func.HttpRequest) -> func.HttpResponse:
     logging.critical("CRITICAL level log")
 
     name = req.params.get("name")
-    if not name:
+    # ボディが空の場合(GETなど)はJSONの解析を行わない
+    if not name and req.get_body():
         try:
             req_body = req.get_json()
         except ValueError:
             pass
         else:
-            name = req_body.get("name")
+            if isinstance(req_body, dict):
+                name = req_body.get("name")
 
     if name:
         return func.HttpResponse(
@@ -75,11 +83,14 @@ def http_trigger(req: func.HttpRequest) -> func.HttpResponse:
 def db_access_whithout_sqlalchemy(req: func.HttpRequest) -> func.HttpResponse:
     logging.info("Python HTTP trigger function processed a request.")
 
+    # DBアクセス用のモジュールは、コールドスタートを軽くするため使用時に読み込む
+    from services import psycopg_sample
+
     try:
         products = psycopg_sample.select()
 
         return func.HttpResponse(
-            body=json.dumps(products), mimetype="application/json", status_code=200
+            body=orjson.dumps(products, default=str), mimetype="application/json", status_code=200
         )
 
     except Exception as e:
@@ -90,39 +101,77 @@ def db_access_whithout_sqlalchemy(req: func.HttpRequest) -> func.HttpResponse:
 def db_select_sample(req: func.HttpRequest) -> func.HttpResponse:
     logging.info("Python HTTP trigger function processed a request.")
 
+    from services import sqlalchemy_sample
+
     try:
         products = sqlalchemy_sample.select()
 
         return func.HttpResponse(
-            body=json.dumps(products), mimetype="application/json", status_code=200
+            body=orjson.dumps(products, default=str), mimetype="application/json", status_code=200
         )
 
     except Exception as e:
-        logging.error(f"Error occurred: {str(e)}")
+        logging.error("Error occurred: %s", str(e))
         return func.HttpResponse(body=f"Error: {str(e)}", status_code=500)
 
 
 @blueprint.route(route="db_upsert_sample", auth_level=func.AuthLevel.ANONYMOUS)
 def db_upsert_sample(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    注文データをupsertする
+
+    リクエストボディに注文データのJSON配列が指定された場合は、まとめて1回でupsertする。
+    (order_dateが未指定の要素には現在日時を設定する)
+    ボディが空の場合は、クエリパラメータの product_id で固定の注文データをupsertする。
+    """
     logging.info("Python HTTP trigger function processed a request.")
 
-    product_id = req.params.get("product_id")
+    from services import sqlalchemy_sample
 
-    order_data = {
-        "order_id": 6,  # 主キーを指定
-        "customer_id": 4,
-        "product_id": product_id,
-        "quantity": 3,
-        "order_date": get_current_datetime(),
-    }
+    orders = None
+    if req.get_body():
+        try:
+            orders = req.get_json()
+        except ValueError:
+            return func.HttpResponse(body="Error: Invalid JSON body", status_code=400)
+        if not isinstance(orders, list) or not all(
+            isinstance(order, dict) for order in orders
+        ):
+            return func.HttpResponse(
+                body="Error: Request body must be a JSON array of orders",
+                status_code=400,
+            )
+        # 各要素はordersテーブルの全列を過不足なく持つこと
+        # (不足した列はupsert時に既存の値を上書きしてしまい、余分なキーは黙って無視されるため)
+        current_datetime = get_current_datetime()
+        for order in orders:
+            order.setdefault("order_date", current_datetime)
+            if order.keys() != sqlalchemy_sample.ORDER_COLUMNS:
+                return func.HttpResponse(
+                    body="Error: Each order must have exactly these keys: "
+                    + ", ".join(sorted(sqlalchemy_sample.ORDER_COLUMNS)),
+                    status_code=400,
+                )
 
     try:
-        sqlalchemy_sample.upsert(order_data)
+        if orders is None:
+            product_id = req.params.get("product_id")
+
+            order_data = {
+                "order_id": 6,  # 主キーを指定
+                "customer_id": 4,
+                "product_id": product_id,
+                "quantity": 3,
+                "order_date": get_current_datetime(),
+            }
+            sqlalchemy_sample.upsert(order_data)
+        else:
+            sqlalchemy_sample.upsert_many(orders)
 
         return func.HttpResponse(status_code=200)
 
     except Exception as e:
-        logging.error(f"Error occurred: {str(e)}")
+        logging.error("Error occurred: %s", str(e))
         return func.HttpResponse(body=f"Error: {str(e)}", status_code=500)
 
 
@@ -130,13 +179,16 @@ def db_upsert_sample(req: func.HttpRequest) -> func.HttpResponse:
 def db_delete_sample(req: func.HttpRequest) -> func.HttpResponse:
     logging.info("Python HTTP trigger function processed a request.")
 
+    from services import sqlalchemy_sample
+
     product_id = req.params.get("product_id")
 
     try:
-        sqlalchemy_sample.delete(int(product_id))
+        deleted_order_id = sqlalchemy_sample.delete(int(product_id))
+        logging.info("Deleted order_id: %s", deleted_order_id)
 
         return func.HttpResponse(status_code=200)
 
     except Exception as e:
-        logging.error(f"Error occurred: {str(e)}")
+        logging.error("Error occurred: %s", str(e))
         return func.HttpResponse(body=f"Error: {str(e)}", status_code=500)
@@ -1,18 +1,44 @@
+import functools
+import keyword
 import os
 import logging
+import threading
 
 from contextlib import contextmanager
-from typing import Generator
+from typing import Any, Callable, Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy import Connection
 from sqlalchemy import Engine
 from sqlalchemy import event
+from sqlalchemy import inspect
+from sqlalchemy import text
+from sqlalchemy import QueuePool
+from sqlalchemy.orm import Mapper
 from sqlalchemy.orm import Session
+from sqlalchemy.orm import sessionmaker
 
+logger = logging.getLogger(__name__)
+
+# ワーカープロセス内で共有するSQLAlchemyエンジン (get_engine()で初期化)
+_engine: Engine | None = None
+_engine_lock = threading.Lock()
+# warm_up_engine()を実行済みかどうか
+_warmed = False
+
+# Sessionのファクトリ (エンジンはsession_scope()で共有のものを渡す)
+SessionFactory = sessionmaker(autocommit=False, autoflush=True)
+
+@functools.lru_cache(maxsize=1)
 def get_db_connection_info() -> dict:
     """
     環境変数からDB接続情報を取得する
 
+    環境変数はワーカーの実行中に変わらないため、初回の結果をキャッシュする。
+    (戻り値の辞書は共有されるため、変更しないこと)
+    テスト等で環境変数を変更した場合は get_db_connection_info.cache_clear() と
+    get_db_url.cache_clear() を呼び出すこと。
+
     Returns:
         dict: DB接続情報
     """
@@ -24,9 +50,23 @@ def get_db_connection_info() -> dict:
         "dbname": os.environ["DB_NAME"]
     }
 
+@functools.lru_cache(maxsize=1)
+def diagnostics_enabled() -> bool:
+    """
+    DBの診断ログ(コネクションプールの状態や件数確認のSELECT等)を出力するかどうかを取得する
+
+    function_app.pyでルートロガーをDEBUGにしているため、ログレベルでは判定せず、
+    環境変数 DB_DIAGNOSTICS=1 が設定されている場合のみ有効にする。(初回の結果をキャッシュする)
+
+    Returns:
+        bool: 診断ログを出力する場合はTrue
+    """
+    return os.environ.get("DB_DIAGNOSTICS") == "1"
+
+@functools.lru_cache(maxsize=1)
 def get_db_url() -> str:
     """
-    DB接続URLを取得する
+    DB接続URLを取得する (初回の結果をキャッシュする)
 
     Returns:
         str: DB接続URL
@@ -40,19 +80,19 @@ def before_cursor_execute(conn, cursor, statement, parameters, context, executem
     SQLAlchemyのbefore_cursor_executeイベントのハンドラー
     """
     # logging.debug("SQL: %s\n  Parameters: %s", statement, parameters)
-    logging.info("SQL: %s\n  Parameters: %s", statement, parameters)
+    logger.info("SQL: %s\n  Parameters: %s", statement, parameters)
 
 def receive_commit(conn):
     """
     SQLAlchemyのcommitイベントのハンドラー
     """
-    logging.info("Transaction committed.")
+    logger.info("Transaction committed.")
 
 def receive_rollback(conn):
     """
     SQLAlchemyのrollbackイベントのハンドラー
     """
-    logging.info("Transaction rolled back.")
+    logger.info("Transaction rolled back.")
 
 def create_sqlalchemy_engine() -> Engine:
     """
@@ -63,7 +103,16 @@ def create_sqlalchemy_engine() -> Engine:
     """
     db_url = get_db_url()
     # return create_engine(db_url, echo=True)
-    engine = create_engine(db_url, echo=False)  # echo=Falseに設定
+    engine = create_engine(
+        db_url,
+        echo=False,  # echo=Falseに設定
+        pool_size=10,  # プールに保持する接続数
+        max_overflow=20,  # pool_sizeを超えて一時的に作成できる接続数
+        pool_timeout=5,  # 接続の空き待ちのタイムアウト(秒)
+        pool_recycle=1800,  # 接続を再作成するまでの時間(秒)
+        pool_pre_ping=True,  # 取得時に接続の生存確認を行う
+        query_cache_size=1200,  # コンパイル済みSQLのキャッシュサイズ (デフォルトは500)
+    )
 
     # logging.getLogger("sqlalchemy.engine").setLevel(logging.DEBUG)  # SQLAlchemyのログレベルをDEBUGに設定
 
@@ -73,21 +122,84 @@ def create_sqlalchemy_engine() -> Engine:
 
     return engine
 
+def get_engine() -> Engine:
+    """
+    ワーカープロセス内で共有するSQLAlchemyエンジンを取得する
+
+    初回呼び出し時のみエンジンを作成し、以降はキャッシュしたエンジン(およびコネクションプール)を返す。
+    Azure Functionsは同一ワーカーで並行に呼び出される場合があるため、作成はロックで保護する。
+
+    Returns:
+        Engine: SQLAlchemyエンジン
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_sqlalchemy_engine()
+    return _engine
+
+def warm_up_engine() -> None:
+    """
+    コネクションプールを事前に温める
+
+    pool_size分の接続を確立して「SELECT 1」を発行し、プールに返却する。
+    プロセスごとに1回だけ行う。(ワーカー起動を妨げないよう、呼び出し側でバックグラウンド実行する想定)
+    """
+    global _warmed
+    with _engine_lock:
+        if _warmed:
+            return
+        _warmed = True
+
+    try:
+        engine = get_engine()
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            # 接続を保持しないプール(NullPool等)では温める意味がない
+            return
+        connections = []
+        try:
+            for _ in range(pool.size()):
+                conn = engine.connect()
+                connections.append(conn)
+                conn.execute(text("SELECT 1"))
+        finally:
+            for conn in connections:
+                conn.close()  # プールに返却
+        logger.info("Connection pool warmed up. (%s)", pool.status())
+    except Exception as e:
+        # 温められなくても、各リクエストで接続するだけなので処理は継続する
+        logger.warning("Failed to warm up connection pool. (%s)", str(e))
+
+def _log_engine_stats(engine: Engine) -> None:
+    """
+    コネクションプールの状態とコンパイル済みSQLキャッシュの件数をDEBUGログに出力する
+    """
+    compiled_cache = engine._compiled_cache
+    logger.debug(
+        "Pool: %s, compiled cache entries: %s",
+        engine.pool.status(),
+        len(compiled_cache) if compiled_cache is not None else "disabled",
+    )
+
 @contextmanager
 def session_scope() -> Generator[Session, None, None]:
     """
     Sessionのcontextmnager.
 
+    エンジン(コネクションプール)はワーカー内で共有し、Sessionのみをリクエストごとに作成する。
+    Sessionはスレッドセーフではないため、withブロックの外やawaitをまたいで保持しないこと。
+
     Yields:
         Generator[Session, None, None]: _description_
     """
-    # SQLAlchemyエンジンを作成
-    engine = create_sqlalchemy_engine()
+    # 共有のSQLAlchemyエンジンを取得
+    engine = get_engine()
+    if diagnostics_enabled():
+        _log_engine_stats(engine)
 
-    session = Session(
-        autocommit=False,
-        autoflush=True,
-        bind=engine)
+    session = SessionFactory(bind=engine)
 
     try:
         yield session  # with asでsessionを渡す
@@ -101,8 +213,58 @@ def session_scope() -> Generator[Session, None, None]:
         session.close()  # どちらにせよ最終的にはclose()
 
 
+@contextmanager
+def connection_scope() -> Generator[Connection, None, None]:
+    """
+    トランザクション付きConnectionのcontextmanager.
+
+    ORMのunit of workが不要な更新系の処理向け。
+    withブロックを正常に抜けるとcommitし、例外が発生した場合はrollbackする。
+
+    Yields:
+        Generator[Connection, None, None]: トランザクションを開始済みのConnection
+    """
+    engine = get_engine()
+    if diagnostics_enabled():
+        _log_engine_stats(engine)
+
+    with engine.begin() as conn:
+        yield conn
+
+
+# マップされたクラスごとに生成した model_to_dict 用の関数のキャッシュ
+_to_dict_functions: dict[type, Callable[[object], dict]] = {}
+
+def _make_to_dict(cls: type) -> Callable[[object], dict]:
+    """
+    マップされたクラス専用の、モデルインスタンスを辞書に変換する関数を生成する
+
+    列ごとの getattr を行わず、属性参照を並べただけの関数をコード生成する。
+
+    Args:
+        cls (type): SQLAlchemyのマップされたクラス
+
+    Returns:
+        Callable[[object], dict]: モデルインスタンスを辞書に変換する関数
+    """
+    items = []
+    mapper: Mapper[Any] = inspect(cls)
+    for column in mapper.local_table.columns:
+        name = column.name
+        # 予約語(from, class等)や識別子として使えない列名は属性参照にできないためgetattrを使う
+        if name.isidentifier() and not keyword.iskeyword(name):
+            value = f"o.{name}"
+        else:
+            value = f"getattr(o, {name!r})"
+        items.append(f"{name!r}: {value}")
+    src = "def to_dict(o):\n    return {" + ", ".join(items) + "}\n"
+    namespace: dict = {}
+    exec(src, namespace)
+    return namespace["to_dict"]
+
 def model_to_dict(model_instance):
-    data = {}
-    for column in model_instance.__table__.columns:
-        data[column.name] = getattr(model_instance, column.name)
-    return data
+    cls = type(model_instance)
+    to_dict = _to_dict_functions.get(cls)
+    if to_dict is None:
+        to_dict = _to_dict_functions[cls] = _make_to_dict(cls)
+    return to_dict(model_instance)
@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from sqlalchemy import Date, ForeignKeyConstraint, Integer, Numeric, PrimaryKeyConstraint, String, UniqueConstraint
+from sqlalchemy import Date, ForeignKeyConstraint, Index, Integer, Numeric, PrimaryKeyConstraint, String, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 import datetime
 import decimal
@@ -46,7 +46,8 @@ class Orders(Base):
             ['customer_id'], ['customers.customer_id'], name='orders_customer_id_fkey'),
         ForeignKeyConstraint(
             ['product_id'], ['products.product_id'], name='orders_product_id_fkey'),
-        PrimaryKeyConstraint('order_id', name='orders_pkey')
+        PrimaryKeyConstraint('order_id', name='orders_pkey'),
+        Index('ix_orders_product_id', 'product_id')
     )
 
     order_id: Mapped[int] = mapped_column(Integer, primary_key=True)
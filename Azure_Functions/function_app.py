@@ -1,4 +1,5 @@
 import logging
+import threading
 
 import azure.functions as func
 
@@ -15,3 +16,18 @@ logging.getLogger().setLevel(logging.DEBUG)  # 全体のログレベルをDEBUG
 fmt = "[%(levelname)s]%(message)s"
 for h in logging.getLogger().handlers:  # Functions ホストが先に追加した StreamHandler
     h.setFormatter(logging.Formatter(fmt))
+
+
+def _warm_up_db() -> None:
+    """
+    DB関連モジュールの読み込みとコネクションプールの準備を行う
+
+    SQLAlchemy等の読み込みはコールドスタートの起動時間に影響するため、バックグラウンドで行う。
+    """
+    from db.common import warm_up_engine
+
+    warm_up_engine()
+
+
+# DBのコネクションプールを事前に温める (ワーカープロセスごとに1回)
+threading.Thread(target=_warm_up_db, daemon=True).start()
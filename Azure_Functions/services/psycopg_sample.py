@@ -1,35 +1,43 @@
-import psycopg
-from db.common import get_db_connection_info
-
-def select() -> list:
-    try:
-        # PostgreSQL接続情報
-        db_info = get_db_connection_info()
-
-        # PostgreSQLに接続
-        conn = psycopg.connect(
-            host=db_info["host"],
-            port=db_info["port"],
-            user=db_info["user"],
-            password=db_info["password"],
-            dbname=db_info["dbname"]
-        )
+import threading
 
-        # カーソルを作成
-        cur = conn.cursor()
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
 
-        # SQLクエリを実行
-        cur.execute("SELECT * FROM products")
-
-        # 結果を取得
-        rows = cur.fetchall()
-
-        # 結果を辞書のlistに変換
-        products = [{"id": row[0], "name": row[1], "price": float(row[2])} for row in rows]
-        return products
+from db.common import get_db_connection_info
 
-    finally:
-        # 接続を閉じる
-        cur.close()
-        conn.close()
+# ワーカープロセス内で共有するコネクションプール (get_pool()で初期化)
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """
+    ワーカープロセス内で共有するpsycopgのコネクションプールを取得する
+
+    Returns:
+        ConnectionPool: コネクションプール
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # PostgreSQL接続情報
+                db_info = get_db_connection_info()
+                _pool = ConnectionPool(
+                    conninfo=make_conninfo(**db_info),
+                    min_size=2,
+                    max_size=10,
+                    kwargs={"prepare_threshold": 0},
+                    open=True,
+                )
+    return _pool
 
+def select() -> list:
+    # プールから接続を借り、カーソルを作成 (withを抜けると接続はプールに返却される)
+    # dict_rowにより、取得時に辞書として行が構築される
+    with get_pool().connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+        # SQLクエリを実行 (列名・型はレスポンスの形式に合わせてSQL側で変換する)
+        cur.execute("SELECT product_id AS id, product_name AS name, price::float8 AS price FROM products")
+
+        # 結果を辞書のlistとして取得
+        return cur.fetchall()
@@ -1,47 +1,88 @@
 import logging
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import delete as sa_delete
+from sqlalchemy import func
+from sqlalchemy import select as sa_select
+from sqlalchemy.dialects.postgresql import Insert, insert
 
-from db.common import session_scope, model_to_dict
+from db.common import connection_scope, diagnostics_enabled, get_engine
 from db.models import Products, Customers, Orders
 
+logger = logging.getLogger(__name__)
+
+def _build_upsert_stmt() -> Insert:
+    """注文データのupsert文を作成する (列の値は実行時のパラメータで指定する)"""
+    stmt = insert(Orders)
+    return stmt.on_conflict_do_update(
+        constraint="orders_pkey",
+        #set_=order_data
+        set_={
+            "customer_id": stmt.excluded.customer_id,
+            "product_id": stmt.excluded.product_id,
+            "quantity": stmt.excluded.quantity,
+            "order_date": stmt.excluded.order_date
+        }
+    )
+
+# インポート時に1回だけ作成するupsert文
+_UPSERT_STMT = _build_upsert_stmt()
+
+# upsertする注文データが持つべきキー (ordersテーブルの列名)
+ORDER_COLUMNS = frozenset(column.name for column in Orders.__table__.columns)
+
 def select() -> list[dict]:
     """selectを実行する"""
-    with session_scope() as session:
-        # SQLAlchemy ORMを使用してデータを取得
-        products = session.query(Products).all()
+    # 参照のみのため、Sessionは使わずにConnectionで実行する
+    with get_engine().connect() as conn:
+        # ORMオブジェクトを生成せず、必要な列のみを取得
+        stmt = sa_select(Products.product_id, Products.product_name, Products.price)
+        rows = conn.execute(stmt).all()
 
-        # 結果を辞書のlistに変換
-        products_list = [{"id": product.product_id, "name": product.product_name, "price": float(product.price)} for product in products]
-        return products_list
+    # 結果を辞書のlistに変換
+    products_list = [{"id": row[0], "name": row[1], "price": float(row[2])} for row in rows]
+    return products_list
 
 def upsert(order_data: dict) -> None:
     """upsertを実行する (PostgreSQLのON CONFLICTを使用)"""
-    with session_scope() as session:
-        stmt = insert(Orders).values(**order_data)
-        stmt = stmt.on_conflict_do_update(
-            constraint="orders_pkey",
-            #set_=order_data
-            set_={
-                "customer_id": stmt.excluded.customer_id,
-                "product_id": stmt.excluded.product_id,
-                "quantity": stmt.excluded.quantity,
-                "order_date": stmt.excluded.order_date
-            }
-        )
-        session.execute(stmt)
-        session.commit()
+    upsert_many([order_data])
 
-        orders = session.query(Orders).all()
-        logging.info("AFTER:  order count: %s", len(orders))
-        for row in orders:
-            logging.info("  row: %s", model_to_dict(row))
+def upsert_many(orders: list[dict]) -> None:
+    """
+    複数件のupsertをまとめて実行する (PostgreSQLのON CONFLICTを使用)
 
+    Args:
+        orders (list[dict]): 注文データのlist (各要素は ORDER_COLUMNS のキーをすべて持つこと。
+            executemanyの列は先頭の要素から決まり、不足した列は既存の値を上書きしてしまう)
+    """
+    if not orders:
+        return
 
+    with connection_scope() as conn:
+        # 注文データはパラメータとして渡す (executemanyとしてまとめて実行される)
+        conn.execute(_UPSERT_STMT, orders)
 
-def delete(product_id: int) -> None:
-    """deleteを実行する"""
-    with session_scope() as session:
-        order = session.query(Orders).filter(Orders.product_id == product_id).first()
-        session.delete(order)
-        session.commit()
+        if diagnostics_enabled():
+            order_count = conn.execute(sa_select(func.count(Orders.order_id))).scalar()
+            logger.debug("AFTER:  order count: %s", order_count)
 
+
+def delete(product_id: int) -> int | None:
+    """
+    deleteを実行する
+
+    Returns:
+        int | None: 削除した注文のorder_id (該当する注文が無い場合はNone)
+    """
+    with connection_scope() as conn:
+        # 該当する注文のうち1件を、1回のDELETE ... RETURNING文で削除する
+        target_order_id = (
+            sa_select(Orders.order_id)
+            .where(Orders.product_id == product_id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = (
+            sa_delete(Orders)
+            .where(Orders.order_id == target_order_id)
+            .returning(Orders.order_id)
+        )
+        return conn.execute(stmt).scalar()
@@ -1,4 +1,6 @@
+import locale
 import os
+import queue
 import subprocess
 import threading
 import time
@@ -9,6 +11,25 @@ from datetime import datetime, timezone
 # STARTED_LOG = "Host started"
 STARTED_LOG = "Worker process started and initialized"
 
+# 標準出力はバイト列のまま保持し、文字列が必要な時にこのエンコーディングでデコードする
+# (text=True の場合と同じエンコーディング)
+STDOUT_ENCODING = locale.getpreferredencoding(False)
+_STARTED_LOG_BYTES = STARTED_LOG.encode(STDOUT_ENCODING)
+
+# 標準出力から一度に読み込む最大バイト数
+READ_CHUNK_SIZE = 64 * 1024
+# ログファイルへ一度に書き込む最大件数
+WRITE_BATCH_SIZE = 256
+# ログファイルをflushする間隔(秒)
+FLUSH_INTERVAL = 0.5
+
+
+def _decode(data: bytes) -> str:
+    """
+    標準出力のバイト列を文字列に変換する (改行コードは\nに統一する)
+    """
+    return data.decode(STDOUT_ENCODING, errors="replace").replace("\r\n", "\n")
+
 
 class FuncRunner:
     """
@@ -17,9 +38,10 @@ class FuncRunner:
 
     def __init__(self, buffer_size=1000, log_dir="logs"):
         self.proc = None
-        self._log_buffer = deque(maxlen=buffer_size)
-        self._lock = threading.Lock()
+        # 標準出力の行をバイト列のまま保持するリングバッファ (古い行から破棄される)
+        self._log_buffer: deque[bytes] = deque(maxlen=buffer_size)
         self._stop_event = threading.Event()
+        self._started = threading.Event()  # 起動完了のログを受信したらセット
         self._thread = None
 
         # ログファイル名の生成
@@ -28,6 +50,11 @@ class FuncRunner:
         self._log_path = os.path.join(log_dir, f"{timestamp}_func.log")
         self._log_file = open(self._log_path, "a", encoding="utf-8")
 
+        # ログファイルへの書き込みはキュー経由で専用スレッドが行う
+        self._write_q: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer_thread = threading.Thread(target=self._write_log_file, daemon=True)
+        self._writer_thread.start()
+
     def start(self) -> None:
         """
         Azure Functionsランタイムを起動する
@@ -42,40 +69,97 @@ class FuncRunner:
 
         self._log_buffer.clear()
         self._stop_event.clear()
+        self._started.clear()
 
         self.proc = subprocess.Popen(
             ["func", "start", "--verbose"],
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
+            bufsize=0,
         )
         self._thread = threading.Thread(target=self._read_stdout, daemon=True)
         self._thread.start()
 
-        # 起動完了を確認
-        for _ in range(300):
-            if any(STARTED_LOG in line for line in self._log_buffer):
-                print("Azure Functions Runtime started.")
-                time.sleep(0.5)  # 少し待ってから返す
-                return
-            time.sleep(0.1)
-        raise TimeoutError("Azure Functions host did not start in time.")
+        # 起動完了を確認 (_read_stdoutが起動完了のログを受信するまで待つ)
+        if not self._started.wait(timeout=30.0):
+            raise TimeoutError("Azure Functions host did not start in time.")
+        print("Azure Functions Runtime started.")
+        time.sleep(0.5)  # 少し待ってから返す
 
     def _read_stdout(self) -> None:
         """
         標準出力を読み取り、ログバッファに追加する
         """
-        for line in self.proc.stdout:
-            with self._lock:
-                self._log_buffer.append(line)
-
-                # ログファイルに書き込む
-                self._log_file.write(line)
-                self._log_file.flush()
+        # 行はバイト列のまま扱い、文字列へのデコードは取得時・ファイル書き込み時に行う
+        # 標準出力はまとめて読み込み、改行位置はbytes.findで探す
+        stdout = self.proc.stdout
+        append = self._log_buffer.append
+        pending = b""  # 改行で終わっていない読み残し
+        while True:
+            # bufsize=0 のため、読み込み可能な分だけ返る (最大 READ_CHUNK_SIZE)
+            chunk = stdout.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            data = pending + chunk if pending else chunk
+
+            start = 0
+            while True:
+                end = data.find(b"\n", start)
+                if end < 0:
+                    break
+                # deque.appendはGILにより不可分なため、ロックは不要
+                append(data[start : end + 1])
+                start = end + 1
+            pending = data[start:]
+
+            if start:
+                # ログファイルへの書き込みは書き込みスレッドに任せる (読み込んだ行をまとめて渡す)
+                self._write_q.put(data[:start])
+                # 起動完了のログを検出したら、start()の待機を解除する
+                if not self._started.is_set() and data.find(_STARTED_LOG_BYTES, 0, start) != -1:
+                    self._started.set()
             if self._stop_event.is_set():
                 break
 
+        if pending:
+            append(pending)
+            self._write_q.put(pending)
+
+    def _write_log_file(self) -> None:
+        """
+        キューに溜まったログをまとめてログファイルに書き込む (書き込みスレッド)
+        Noneを受け取ると、残りを書き込んで終了する
+        """
+        last_flush = time.monotonic()
+        while True:
+            try:
+                line = self._write_q.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                self._log_file.flush()
+                last_flush = time.monotonic()
+                continue
+
+            stopped = line is None
+            batch = [] if stopped else [line]
+            while not stopped and len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    line = self._write_q.get_nowait()
+                except queue.Empty:
+                    break
+                if line is None:
+                    stopped = True
+                else:
+                    batch.append(line)
+
+            # まとめて1回でデコードして書き込む
+            self._log_file.write(_decode(b"".join(batch)))
+            if stopped:
+                self._log_file.flush()
+                return
+            if time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                self._log_file.flush()
+                last_flush = time.monotonic()
+
     def stop(self) -> None:
         """
         Azure Functionsランタイムを停止する
@@ -88,6 +172,9 @@ class FuncRunner:
         if self._thread:
             self._thread.join()
             self._thread = None
+        # 書き込みスレッドを終了させてから、ログファイルを閉じる
+        self._write_q.put(None)
+        self._writer_thread.join()
         self._log_file.close()
         print("Azure Functions Runtime stopped.")
 
@@ -97,8 +184,7 @@ class FuncRunner:
         Returns:
             list: ログの行のリスト
         """
-        with self._lock:
-            return list(self._log_buffer)
+        return [_decode(line) for line in list(self._log_buffer)]
 
     def get_and_clear_log_lines(self) -> list:
         """
@@ -106,10 +192,10 @@ class FuncRunner:
         Returns:
             list: ログの行のリスト
         """
-        with self._lock:
-            lines = list(self._log_buffer)
-            self._log_buffer.clear()
-            return lines
+        # 取得時点の行数分だけpopleftする (読み取りスレッドが並行して追加した行は残る)
+        buffer = self._log_buffer
+        popleft = buffer.popleft
+        return [_decode(popleft()) for _ in range(len(buffer))]
 
     def write_log_message(self, message: str) -> None:
         """
@@ -121,6 +207,4 @@ class FuncRunner:
         timestamped_message = (
             f"[{now_utc.strftime('%Y-%m-%dT%H:%M:%S')}.{milliseconds:03d}Z] {message}\n"
         )
-        with self._lock:
-            self._log_file.write(timestamped_message)
-            self._log_file.flush()
+        self._write_q.put(timestamped_message.encode(STDOUT_ENCODING))
@@ -4,6 +4,28 @@ import logging
 import requests
 
 
+def _split_log_line(log_line: str) -> tuple[str, str] | None:
+    """
+    ログ行をログレベルとログ本文に分割する.
+    Args:
+        log_line (str): A single line from the log.
+    Returns:
+        tuple[str, str] | None: (ログレベル, ログ本文). 形式が一致しない場合はNone.
+    """
+    # log_lineの先頭は"[<TIMESTAMP>] [<LOG_LEVEL>]"の形式であることを前提とする
+    if not log_line.startswith("["):
+        return None
+    ts_end = log_line.find("]")
+    if ts_end < 0 or not log_line.startswith(" [", ts_end + 1):
+        return None
+    level_start = ts_end + 3  # "] ["の後から始まる
+    level_end = log_line.find("]", level_start)
+    if level_end < 0:
+        return None
+    # ログ本文はレベルの"]"の直後から (再検索はしない)
+    return log_line[level_start:level_end], log_line[level_end + 1 :]
+
+
 def detect_log_level(log_line: str) -> str:
     """
     ログからログレベルを取得.
@@ -12,12 +34,8 @@ def detect_log_level(log_line: str) -> str:
     Returns:
         str: The detected log level (e.g., "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL").
     """
-    # log_lineの先頭は"[<TIMESTAMP>] [<LOG_LEVEL>]"の形式であることを前提とする
-    if log_line.startswith("[") and "]" in log_line:
-        level_start = log_line.index("] [") + 3  # "] ["の後から始まる
-        level_end = log_line.index("]", level_start)
-        return log_line[level_start:level_end].upper()
-    return "UNKNOWN"
+    parts = _split_log_line(log_line)
+    return parts[0].upper() if parts else "UNKNOWN"
 
 
 def check_log(log_lines: list, level: str, text: str) -> str | None:
@@ -30,26 +48,21 @@ def check_log(log_lines: list, level: str, text: str) -> str | None:
     Returns:
         str: The actual log if found, otherwise None.
     """
-    actual_line = None
-    actual_level = "UNKNOWN"
-
     for line in log_lines:
-        if text in line:
-            actual_level = detect_log_level(line)
-
-            # ログ本文を抽出
-            log_level_str = f"[{actual_level}]"
-            log_level_start = line.index(log_level_str)
-            msg_start = log_level_start + len(log_level_str)
-            log_msg = line[msg_start:]
-            actual_line = log_msg
-
-            assert (
-                actual_level == level
-            ), f"Expected log level '{level}' but found '{actual_level}' in line: {line}"
-            break
-
-    return actual_line
+        if line.find(text) < 0:
+            continue
+
+        # ログレベルとログ本文を1回の走査で抽出
+        parts = _split_log_line(line)
+        actual_level = parts[0].upper() if parts else "UNKNOWN"
+        actual_line = parts[1] if parts else line
+
+        assert (
+            actual_level == level
+        ), f"Expected log level '{level}' but found '{actual_level}' in line: {line}"
+        return actual_line
+
+    return None
 
 
 def test_log_levels(runner):
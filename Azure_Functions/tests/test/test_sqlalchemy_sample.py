@@ -15,10 +15,23 @@ from tests.factories import ProductFactory, OrderFactory, CustomerFactory
 
 # filepath: services/test_sqlalchemy_sample.py
 
+def log_orders(db_session, label: str) -> None:
+    """
+    ordersテーブルの件数と全行をログに出力する (INFOが無効な場合は検索もしない)
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    orders = db_session.query(Orders).all()
+    logger.info("%s order count: %s", label, len(orders))
+    for row in orders:
+        logger.info("  row: %s", model_to_dict(row))
+
 def test_select(db_session):
     logging.info("test_select started")
     # Create db data
-    products_data = [ProductFactory() for _ in range(3)]
+    products_data = ProductFactory.build_batch(3)
+    db_session.bulk_save_objects(products_data)
+    db_session.commit()
 
     # Call the function
     result = target.select()
@@ -37,8 +50,10 @@ def test_select(db_session):
 def test_upsert_insert(db_session):
     logger.info("test_upsert started")
     # Create db data
-    product = ProductFactory()
-    customer = CustomerFactory()
+    product = ProductFactory.build()
+    customer = CustomerFactory.build()
+    db_session.bulk_save_objects([product, customer])
+    db_session.commit()
 
     order_date = date(2023, 10, 1)
 
@@ -70,18 +85,17 @@ def test_upsert_insert(db_session):
 
 def test_upsert_update(db_session):
     logger.info("test_upsert started")
-    orders = db_session.query(Orders).all()
-    logger.info("order count: %s", len(orders))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("order count: %s", db_session.query(Orders).count())
 
     # Create db data
-    product = ProductFactory()
-    customer = CustomerFactory()
-    order = OrderFactory(customer=customer, product=product)
+    product = ProductFactory.build()
+    customer = CustomerFactory.build()
+    order = OrderFactory.build(customer=customer, product=product)
+    db_session.bulk_save_objects([product, customer, order])
+    db_session.commit()
 
-    orders = db_session.query(Orders).all()
-    logger.info("BEFORE: order count: %s", len(orders))
-    for row in orders:
-        logger.info("  row: %s", model_to_dict(row))
+    log_orders(db_session, "BEFORE:")
 
     order_data = {
         "order_id": order.order_id,
@@ -105,10 +119,7 @@ def test_upsert_update(db_session):
         .first()
     )
 
-    orders = db_session.query(Orders).all()
-    logger.info("AFTER:  order count: %s", len(orders))
-    for row in orders:
-        logger.info("  row: %s", model_to_dict(row))
+    log_orders(db_session, "AFTER: ")
 
     assert order is not None
     assert order.customer_id == order_data["customer_id"]
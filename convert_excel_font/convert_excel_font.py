@@ -14,8 +14,9 @@ import argparse
 import math
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any, Set, cast
+from typing import Any, Dict, Set, cast
 
 import xlwings as xw  # type: ignore
 from xlwings import Range, Shape, Sheet
@@ -29,12 +30,18 @@ class ExcelFontChanger:
     FONT_SIZE_RATIO_FOR_LT_11 = 0.85
     LINE_SPACE_WITHIN = 0.8
 
-    def __init__(self, exclude_sheets=None):
+    # 変更前フォントサイズ → 変更後フォントサイズ のキャッシュ
+    # (使われるサイズは数種類程度のため、計算はサイズごとに1回で済む)
+    _SIZE_CACHE: Dict[float, float] = {}
+
+    def __init__(self, exclude_sheets=None, jobs=1):
         """
         Args:
             exclude_sheets (list): 処理対象外のシート名リスト
+            jobs (int): 並列に処理するファイル数(Excelプロセス数)
         """
         self.exclude_sheets = exclude_sheets or []
+        self.jobs = max(1, jobs)
 
     def process_path(self, path):
         """パス(ファイルまたはフォルダ)を処理"""
@@ -56,10 +63,48 @@ class ExcelFontChanger:
 
             print(f"フォルダ内のExcelファイル数: {len(excel_files)}")
 
+            if self.jobs > 1 and len(excel_files) > 1:
+                # ファイルごとに別の Excel プロセスで並列処理
+                # (COM 呼び出しの待ち時間を重ねるため、スレッドごとに xw.App を起動する)
+                with ThreadPoolExecutor(max_workers=min(self.jobs, len(excel_files))) as executor:
+                    futures = {
+                        executor.submit(
+                            self._process_file_in_thread, str(file_path), f"[{i}/{len(excel_files)}]"
+                        ): file_path
+                        for i, file_path in enumerate(excel_files, 1)
+                    }
+                    # process_file の外で発生した例外(COM の初期化失敗など)もここで報告する
+                    for future in as_completed(futures):
+                        try:
+                            future.result()
+                        except Exception as e:
+                            print(f"\n✗ エラー: {futures[future].name}: {e}")
+                            traceback.print_exc()
+                return
+
             for i, file_path in enumerate(excel_files, 1):
                 print(f"\n[{i}/{len(excel_files)}] {file_path.name}")
                 self.process_file(str(file_path))
 
+    def _process_file_in_thread(self, file_path, progress):
+        """ワーカースレッドで単一のExcelファイルを処理
+
+        Args:
+            file_path (str): 処理するExcelファイルのパス
+            progress (str): 処理開始時に表示する進捗 ("[i/N]")
+        """
+        # 投入時ではなく、実際に処理を始める時点でファイル名を表示する
+        print(f"\n{progress} {Path(file_path).name}")
+
+        # COM はスレッドごとに初期化が必要
+        import pythoncom  # type: ignore
+
+        pythoncom.CoInitialize()
+        try:
+            self.process_file(file_path)
+        finally:
+            pythoncom.CoUninitialize()
+
     def process_file(self, file_path: Path):
         """単一のExcelファイルを処理"""
         print(f"処理開始: {file_path}")
@@ -107,7 +152,7 @@ class ExcelFontChanger:
     def process_cells(self, sheet: Sheet):
         """セルのフォントを処理"""
         changed_count = 0
-        processed_addresses: Set[Any] = set()  # 重複処理を避けるためのセット
+        processed_addresses: Set[Any] = set()  # 重複処理を避けるためのセット ((行, 列) を保持)
 
         try:
             # 1. SpecialCells で値が入っているセルを取得
@@ -126,13 +171,20 @@ class ExcelFontChanger:
             except Exception:
                 pass
 
+            # 非表示の行・列はシートごとに一度だけ取得する
+            hidden_rows, hidden_cols = self._get_hidden_rows_cols(sheet)
+
             # 定数セルの処理
             if constants is not None:
-                changed_count += self._process_range(sheet, constants, processed_addresses)
+                changed_count += self._process_range(
+                    sheet, constants, processed_addresses, hidden_rows, hidden_cols
+                )
 
             # 数式セルの処理
             if formulas is not None:
-                changed_count += self._process_range(sheet, formulas, processed_addresses)
+                changed_count += self._process_range(
+                    sheet, formulas, processed_addresses, hidden_rows, hidden_cols
+                )
 
             # 2. 結合セルを取得して処理
             # UsedRange から結合セルを抽出
@@ -158,7 +210,7 @@ class ExcelFontChanger:
 
                             # アドレスを取得
                             addr = cell_api.Address
-                            if addr in processed_addresses:
+                            if (cell_api.Row, cell_api.Column) in processed_addresses:
                                 continue
                                 # pass
 
@@ -178,7 +230,7 @@ class ExcelFontChanger:
                             if self._process_single_cell(xw_cell):
                                 changed_count += 1
 
-                            processed_addresses.add(addr)
+                            processed_addresses.add((cell_api.Row, cell_api.Column))
 
                         except Exception as e:
                             print(f"        警告: 結合セル処理中にエラー: {e}")
@@ -191,38 +243,206 @@ class ExcelFontChanger:
 
         return changed_count
 
-    def _process_range(self, sheet: Sheet, range_obj, processed_addresses: Set):
+    def _get_hidden_rows_cols(self, sheet: Sheet):
+        """UsedRange 内の非表示の行番号・列番号のセットを取得
+
+        行・列ごとに非表示状態を確認すると行数・列数分の COM 呼び出しになるため、
+        まず UsedRange 全体の状態を確認し(混在している場合は None が返る)、
+        非表示の行・列がある場合のみ1行・1列ずつ確認する。
+        """
+        hidden_rows: Set[int] = set()
+        hidden_cols: Set[int] = set()
+
+        try:
+            sheet_api = sheet.api
+            used_range = sheet_api.UsedRange
+            top = used_range.Row
+            left = used_range.Column
+
+            if used_range.EntireRow.Hidden is not False:
+                rows_api = sheet_api.Rows
+                hidden_rows = {r for r in range(top, top + used_range.Rows.Count) if rows_api(r).Hidden}
+
+            if used_range.EntireColumn.Hidden is not False:
+                columns_api = sheet_api.Columns
+                hidden_cols = {
+                    c for c in range(left, left + used_range.Columns.Count) if columns_api(c).Hidden
+                }
+
+        except Exception as e:
+            print(f"    警告: 非表示の行・列の取得中にエラー: {e}")
+
+        return hidden_rows, hidden_cols
+
+    def _process_range(
+        self, sheet: Sheet, range_obj, processed_addresses: Set, hidden_rows: Set[int], hidden_cols: Set[int]
+    ):
         """Range オブジェクト内のセルを処理"""
         changed_count = 0
 
         try:
-            # Range を xlwings の Range に変換
             for area in range_obj.Areas:
-                xw_range = sheet.range(area.Address)
+                changed_count += self._bulk_scan(
+                    sheet,
+                    area.Row,
+                    area.Column,
+                    area.Rows.Count,
+                    area.Columns.Count,
+                    processed_addresses,
+                    hidden_rows,
+                    hidden_cols,
+                )
 
-                for cell in xw_range:
-                    # 既に処理済みの場合はスキップ
-                    if cell.address in processed_addresses:
-                        continue
+        except Exception:
+            pass
 
-                    # 非表示セルはスキップ
-                    try:
-                        if cell.api.EntireRow.Hidden or cell.api.EntireColumn.Hidden:
-                            continue
-                    except Exception:
+        return changed_count
+
+    def _bulk_scan(
+        self,
+        sheet: Sheet,
+        top: int,
+        left: int,
+        rows: int,
+        cols: int,
+        processed_addresses: Set,
+        hidden_rows: Set[int],
+        hidden_cols: Set[int],
+    ):
+        """矩形範囲のセルをまとめて処理
+
+        フォント名・サイズ・太字は、範囲内で一様なら範囲に対する1回の COM 呼び出しで
+        取得・設定できる(混在している場合は None が返る)。一様な範囲はまとめて処理し、
+        混在している範囲、非表示の行・列を一部に含む範囲のみ半分に分割して再帰的に処理する。
+        """
+        args = (processed_addresses, hidden_rows, hidden_cols)
+        cell_count = rows * cols
+
+        # 1セルの範囲、または処理済みセルを含む範囲はセル単位で処理
+        if cell_count == 1 or self._overlaps_processed(processed_addresses, top, left, rows, cols):
+            return self._process_cells_one_by_one(sheet, top, left, rows, cols, *args)
+
+        row_hidden = [r in hidden_rows for r in range(top, top + rows)]
+        col_hidden = [c in hidden_cols for c in range(left, left + cols)]
+
+        if all(row_hidden) or all(col_hidden):
+            # すべて非表示のためスキップ
+            return 0
+
+        if not any(row_hidden) and not any(col_hidden):
+            sheet_api = sheet.api
+            area = sheet_api.Range(
+                sheet_api.Cells(top, left), sheet_api.Cells(top + rows - 1, left + cols - 1)
+            )
+            try:
+                font = area.Font
+                old_name = font.Name
+
+                if old_name == self.TARGET_FONT:
+                    # すべて変更不要
+                    processed_addresses.update(self._iter_keys(top, left, rows, cols))
+                    return 0
+
+                if old_name is not None:
+                    old_size = font.Size
+                    old_bold = font.Bold
+                    if old_size is not None and old_bold is not None:
+                        new_size = self._calc_new_size(old_size)
+                        font.Name = self.TARGET_FONT
+                        font.Size = new_size
+                        font.Bold = old_bold
+                        print(
+                            f"        - フォント: {area.Address} - [{old_name}, {old_size}]"
+                            f" -> {self.TARGET_FONT}, {new_size} : {cell_count}セル"
+                        )
+                        processed_addresses.update(self._iter_keys(top, left, rows, cols))
+                        return cell_count
+            except Exception:
+                return self._process_cells_one_by_one(sheet, top, left, rows, cols, *args)
+
+        # 混在しているため、行方向(1行の場合は列方向)に分割して再帰処理
+        if rows > 1:
+            half = rows // 2
+            return self._bulk_scan(sheet, top, left, half, cols, *args) + self._bulk_scan(
+                sheet, top + half, left, rows - half, cols, *args
+            )
+        half = cols // 2
+        return self._bulk_scan(sheet, top, left, rows, half, *args) + self._bulk_scan(
+            sheet, top, left + half, rows, cols - half, *args
+        )
+
+    @staticmethod
+    def _iter_keys(top: int, left: int, rows: int, cols: int):
+        """矩形範囲内のセルの (行, 列) を順に返す"""
+        return ((r, c) for r in range(top, top + rows) for c in range(left, left + cols))
+
+    @classmethod
+    def _overlaps_processed(cls, processed_addresses: Set, top: int, left: int, rows: int, cols: int):
+        """矩形範囲に処理済みのセルが含まれるかを判定
+
+        範囲内のセルと処理済みセルのうち、少ない方だけを走査する。
+        """
+        if not processed_addresses:
+            return False
+        if rows * cols <= len(processed_addresses):
+            return any(key in processed_addresses for key in cls._iter_keys(top, left, rows, cols))
+        bottom = top + rows
+        right = left + cols
+        return any(top <= r < bottom and left <= c < right for r, c in processed_addresses)
+
+    def _process_cells_one_by_one(
+        self,
+        sheet: Sheet,
+        top: int,
+        left: int,
+        rows: int,
+        cols: int,
+        processed_addresses: Set,
+        hidden_rows: Set[int],
+        hidden_cols: Set[int],
+    ):
+        """矩形範囲のセルを1セルずつ処理"""
+        changed_count = 0
+
+        try:
+            # ループ内で繰り返し参照するメソッドは事前に束縛しておく
+            process_single_cell = self._process_single_cell
+            mark_processed = processed_addresses.add
+            get_range = sheet.range
+
+            # 行・列番号から判定し、COM 呼び出し(アドレス・行列番号の取得)は処理対象のセルに限る
+            for r in range(top, top + rows):
+                # 非表示行のセルはスキップ
+                if r in hidden_rows:
+                    continue
+
+                for c in range(left, left + cols):
+                    key = (r, c)
+
+                    # 既に処理済み、または非表示列のセルはスキップ
+                    if key in processed_addresses or c in hidden_cols:
                         continue
 
                     # フォント処理
-                    if self._process_single_cell(cell):
+                    if process_single_cell(get_range(key)):
                         changed_count += 1
 
-                    processed_addresses.add(cell.address)
+                    mark_processed(key)
 
         except Exception:
             pass
 
         return changed_count
 
+    def _calc_new_size(self, old_size):
+        """変更後のフォントサイズを計算(0.5刻みで小さい方に丸める)"""
+        new_size = self._SIZE_CACHE.get(old_size)
+        if new_size is None:
+            ratio = self.FONT_SIZE_RATIO_FOR_GE_11 if old_size >= 11 else self.FONT_SIZE_RATIO_FOR_LT_11
+            new_size = math.floor(old_size * ratio * 2) / 2
+            self._SIZE_CACHE[old_size] = new_size
+        return new_size
+
     def _process_single_cell(self, cell: Range):
         """単一セルのフォントを処理"""
         try:
@@ -245,15 +465,7 @@ class ExcelFontChanger:
                         old_size = 11
                     print(f"                  : old_size: None → {old_size}")
 
-                # new_size = math.floor(old_size * self.FONT_SIZE_RATIO)
-                if old_size >= 11:
-                    new_size = (
-                        math.floor(old_size * self.FONT_SIZE_RATIO_FOR_GE_11 * 2) / 2
-                    )  # 0.5刻みで小さい方に丸める
-                else:
-                    new_size = (
-                        math.floor(old_size * self.FONT_SIZE_RATIO_FOR_LT_11 * 2) / 2
-                    )  # 0.5刻みで小さい方に丸める
+                new_size = self._calc_new_size(old_size)
 
                 font.name = self.TARGET_FONT
                 font.size = new_size
@@ -277,6 +489,14 @@ class ExcelFontChanger:
         try:
             shapes = sheet.shapes
 
+            # ループ内で繰り返し参照するメソッドは事前に束縛しておく
+            is_group_shape = self._is_group_shape
+            process_grouped_shapes = self._process_grouped_shapes
+            has_textframe2 = self.has_textframe2
+            process_shape_textframe2 = self.process_shape_textframe2
+            has_textframe = self.has_textframe
+            process_shape_textframe = self.process_shape_textframe
+
             for shape in shapes:
                 try:
                     # 非表示シェイプはスキップ
@@ -284,16 +504,16 @@ class ExcelFontChanger:
                         continue
 
                     # グループシェイプの場合は再帰的に処理
-                    if self._is_group_shape(shape):
-                        changed_count += self._process_grouped_shapes(shape)
+                    if is_group_shape(shape):
+                        changed_count += process_grouped_shapes(shape)
                     else:
                         # TextFrame2 を優先的に使用
-                        if self.has_textframe2(shape):
-                            if self.process_shape_textframe2(shape):
+                        if has_textframe2(shape):
+                            if process_shape_textframe2(shape):
                                 changed_count += 1
                         # TextFrame2 がない場合は TextFrame を使用
-                        elif self.has_textframe(shape):
-                            if self.process_shape_textframe(shape):
+                        elif has_textframe(shape):
+                            if process_shape_textframe(shape):
                                 changed_count += 1
 
                 except Exception:
@@ -343,10 +563,11 @@ class ExcelFontChanger:
         try:
             # GroupItems で グループ内のシェイプを取得
             group_items = com_group_shape.GroupItems
+            get_item = group_items.Item
 
             for i in range(1, group_items.Count + 1):
                 try:
-                    com_shape = group_items.Item(i)
+                    com_shape = get_item(i)
 
                     # 非表示はスキップ
                     if not com_shape.Visible:
@@ -387,15 +608,7 @@ class ExcelFontChanger:
                 old_name = font.Name
                 old_size = font.Size
 
-                # new_size = math.floor(old_size * self.FONT_SIZE_RATIO)
-                if old_size >= 11:
-                    new_size = (
-                        math.floor(old_size * self.FONT_SIZE_RATIO_FOR_GE_11 * 2) / 2
-                    )  # 0.5刻みで小さい方に丸める
-                else:
-                    new_size = (
-                        math.floor(old_size * self.FONT_SIZE_RATIO_FOR_LT_11 * 2) / 2
-                    )  # 0.5刻みで小さい方に丸める
+                new_size = self._calc_new_size(old_size)
 
                 font.Name = self.TARGET_FONT
                 font.NameFarEast = self.TARGET_FONT
@@ -421,15 +634,7 @@ class ExcelFontChanger:
 
             if font.Name != self.TARGET_FONT:
                 old_size = font.Size
-                # new_size = math.floor(old_size * self.FONT_SIZE_RATIO)
-                if old_size >= 11:
-                    new_size = (
-                        math.floor(old_size * self.FONT_SIZE_RATIO_FOR_GE_11 * 2) / 2
-                    )  # 0.5刻みで小さい方に丸める
-                else:
-                    new_size = (
-                        math.floor(old_size * self.FONT_SIZE_RATIO_FOR_LT_11 * 2) / 2
-                    )  # 0.5刻みで小さい方に丸める
+                new_size = self._calc_new_size(old_size)
 
                 font.Name = self.TARGET_FONT
                 font.NameFarEast = self.TARGET_FONT
@@ -473,6 +678,12 @@ def main():
         default=[],
         help="処理対象外のシート名(スペース区切りで複数指定可)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="並列に処理するファイル数(Excelプロセス数、2～4程度を推奨) (デフォルト: 1)",
+    )
 
     args = parser.parse_args()
 
@@ -488,7 +699,7 @@ def main():
     print("=" * 60)
     print()
 
-    changer = ExcelFontChanger(exclude_sheets=args.exclude_sheets)
+    changer = ExcelFontChanger(exclude_sheets=args.exclude_sheets, jobs=args.jobs)
     changer.process_path(args.path)
 
     elapsed = time.time() - start_time
@@ -1,14 +1,370 @@
+import functools
+import gc
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
 import sys
 import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing.util import Finalize
 from pathlib import Path
 
 import xlwings as xw  # type: ignore
-from plyer import notification  # type: ignore
-from PyPDF2 import PdfMerger  # type: ignore
 
+# GetDriveTypeW の戻り値: ネットワークドライブ
+DRIVE_REMOTE = 4
 
-def export_excels_to_pdf(input_dir, output_dir=None, recursive=False, add_bookmarks: bool = False):
+# 変換済みExcelファイルの内容(サイズ・ハッシュ)と変換オプション(ブックマークの有無)を記録するマニフェストファイル名 (出力先フォルダに作成)
+MANIFEST_NAME = ".convert_manifest.json"
+
+# 変換対象とするExcelファイルの拡張子
+EXCEL_SUFFIXES = (".xls", ".xlsx", ".xlsm", ".xlsb")
+
+
+def load_manifest(manifest_path: Path) -> dict:
+    """マニフェストを読み込む（存在しない・壊れている場合は空）"""
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(manifest_path: Path, manifest: dict) -> None:
+    """マニフェストを書き込む"""
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def file_digest(path: Path) -> str:
+    """ファイル内容のハッシュ値（BLAKE2b）を求める"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def iter_excel_files(root: Path, recursive: bool):
+    """
+    フォルダ内のExcelファイルを列挙する（一時ファイル "~$..." は除外）
+
+    os.scandirのエントリ情報を使い、ファイル/フォルダの判定で余分なstat()を行わない。
+    """
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif entry.name.lower().endswith(EXCEL_SUFFIXES) and not entry.name.startswith("~$"):
+                    yield Path(entry.path)
+
+
+@functools.lru_cache(maxsize=None)
+def _is_remote_drive(drive: str) -> bool:
+    """ドライブ（"Z:" など）がネットワークドライブかどうか（Windows以外は常にFalse）"""
+    if sys.platform != "win32":
+        return False
+    import ctypes
+
+    return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == DRIVE_REMOTE  # type: ignore
+
+
+def is_network_path(path: Path) -> bool:
+    """パスがネットワーク上（UNCパス、またはネットワークドライブ）かどうか"""
+    if str(path).startswith("\\\\"):
+        return True
+    return bool(path.drive) and _is_remote_drive(path.drive)
+
+
+# 同じExcelインスタンスで変換するファイル数の上限（長時間使い続けたExcelは遅くなるため、超えたら起動し直す）
+APP_RECYCLE_INTERVAL = 50
+
+# ワーカープロセスごとに1つだけ起動するExcelバックグラウンドインスタンス
+_app = None
+# _app で変換したファイル数
+_converted_count = 0
+# プロセス終了時にExcelを終了する処理（Excelを起動し直しても登録は1回だけ）
+_finalizer = None
+
+
+def _get_app():
+    """このプロセス用のExcelインスタンスを取得する（初回のみ起動し、プロセス終了時に終了する）"""
+    global _app, _finalizer
+    if _app is None:
+        app = xw.App(visible=False, add_book=False)
+        try:
+            app.display_alerts = False
+            app.screen_updating = False
+            # 出力するのは静的なPDFのため、開いたブックのイベント（Workbook_Openなど）・マクロ・
+            # 外部リンク更新の確認は不要（ブックごとの開く処理の固定コストを省く）
+            app.enable_events = False
+            app.api.AskToUpdateLinks = False
+            app.api.AutomationSecurity = 3  # msoAutomationSecurityForceDisable
+            # 開いたブックの再計算をしない（PDFには保存済みの計算結果を出力する）
+            # ブックが1つも開いていないと計算方法を変更できないため、一時的な空のブックを開いて設定する
+            tmp_book = app.books.add()
+            try:
+                app.calculation = "manual"
+                app.api.CalculateBeforeSave = False
+            finally:
+                tmp_book.close()
+        except Exception:
+            # 設定に失敗した場合も、起動したExcelプロセスは残さない
+            try:
+                app.quit()
+            except Exception:
+                pass
+            raise
+        _app = app
+        # ワーカープロセスではatexitが呼ばれないため、multiprocessingの終了処理に登録する
+        if _finalizer is None:
+            _finalizer = Finalize(None, _quit_app, exitpriority=10)
+    return _app
+
+
+def _init_worker():
+    """
+    ワーカープロセスの初期化（最初の変換を待たずにExcelを起動しておく）
+
+    起動に失敗してもここでは例外を出さない（プール全体が使えなくなるため）。
+    変換時に再度起動を試み、そのファイルの変換エラーとして報告する。
+    """
+    try:
+        _get_app()
+    except Exception:
+        pass
+
+
+def _quit_app():
+    """このプロセス用のExcelインスタンスを終了する"""
+    global _app, _converted_count
+    # Excelプロセスを確実に終了
+    try:
+        if _app is not None:
+            _app.quit()
+    except Exception:
+        pass
+    _app = None
+    _converted_count = 0
+
+
+def _release_after_convert():
+    """
+    ブック1つの変換後に呼び出し、COMオブジェクトを解放する
+
+    変換したファイル数が APP_RECYCLE_INTERVAL に達したらExcelを終了し、次の変換時に起動し直す。
+    """
+    global _converted_count
+    # 循環参照などで残ったブックのCOMオブジェクトをすぐに解放する
+    gc.collect()
+    _converted_count += 1
+    if _converted_count >= APP_RECYCLE_INTERVAL:
+        _quit_app()
+
+
+def _open_tmp_pdf(tmp_pdf: Path):
+    """
+    Excelが出力した一時PDFを開く
+
+    メモリマップで開き、ファイル全体をPythonに読み込むコピーを省く。
+    """
+    import pikepdf  # type: ignore
+
+    return pikepdf.open(tmp_pdf, access_mode=pikepdf.AccessMode.mmap)
+
+
+def _save_pdf(pdf, pdf_path: Path) -> None:
+    """
+    PDFを保存する
+
+    オブジェクトストリームを生成し、未圧縮のストリームも圧縮して出力ファイルを小さくする。
+    """
+    import pikepdf  # type: ignore
+
+    pdf.save(pdf_path, compress_streams=True, object_stream_mode=pikepdf.ObjectStreamMode.generate)
+
+
+def _export_book_at_once(book, sheets, pdf_path: Path, tmp_pdf: Path) -> bool:
+    """
+    ブック全体を1回のエクスポートでPDFに出力し、シートごとの印刷ページ数からブックマークを付ける
+
+    Args:
+        sheets: 表示シートの (シート名, SheetのCOMオブジェクト) のリスト
+
+    Returns:
+        bool: 出力できた場合はTrue（ページ数が一致しない場合などはFalse）
+    """
+    import pikepdf  # type: ignore
+
+    try:
+        page_counts = [sheet_api.PageSetup.Pages.Count for _, sheet_api in sheets]
+        # ブック全体（表示シートのみ）を1つのPDFとして保存
+        book.api.ExportAsFixedFormat(0, str(tmp_pdf))
+    except Exception:
+        return False
+
+    with _open_tmp_pdf(tmp_pdf) as pdf:
+        # シートごとのページ数とPDFのページ数が一致しない場合はブックマークの位置が分からない
+        if len(pdf.pages) != sum(page_counts):
+            return False
+
+        with pdf.open_outline() as outline:
+            start_page = 0
+            for (name, _), page_count in zip(sheets, page_counts):
+                if page_count:
+                    outline.root.append(pikepdf.OutlineItem(name, start_page))
+                start_page += page_count
+        _save_pdf(pdf, pdf_path)
+    return True
+
+
+def _export_sheets_and_merge(sheets, pdf_path: Path, tmpdir_path: Path) -> None:
+    """
+    シートごとにPDFを出力し、ブックマークを付けて1つのPDFに結合する
+
+    Excelによる次のシートの出力と、出力済みシートのPDFの結合を並行して行う。
+    COMの呼び出しは呼び出し元のスレッドのまま行い、結合だけを1つのスレッドで順番に行う。
+
+    Args:
+        sheets: 表示シートの (シート名, SheetのCOMオブジェクト) のリスト
+    """
+    import pikepdf  # type: ignore
+
+    # 結合先のPDFと、結合元の一時PDF（保存するまで開いておく必要がある）
+    dst = pikepdf.Pdf.new()
+    sources = []
+
+    try:
+        with dst.open_outline() as outline:
+
+            def append_pdf(tmp_pdf: Path, title: str) -> None:
+                # pikepdfでページを追加＋ブックマーク
+                src = _open_tmp_pdf(tmp_pdf)
+                sources.append(src)
+                start_page = len(dst.pages)
+                dst.pages.extend(src.pages)
+                outline.root.append(pikepdf.OutlineItem(title, start_page))
+
+            with ThreadPoolExecutor(max_workers=1) as merger:
+                futures = []
+                for name, sheet_api in sheets:
+                    tmp_pdf = tmpdir_path / f"{name}.pdf"
+                    # 各シートを一時PDFとして保存
+                    sheet_api.ExportAsFixedFormat(0, str(tmp_pdf))
+                    futures.append(merger.submit(append_pdf, tmp_pdf, name))
+                # 結合で発生した例外を呼び出し元に伝える
+                for future in futures:
+                    future.result()
+
+        _save_pdf(dst, pdf_path)
+
+    finally:
+        dst.close()
+        for src in sources:
+            src.close()
+
+
+def _export_with_bookmarks(book, pdf_path: Path):
+    """
+    表示シートごとにブックマークを付けて、ブックを1つのPDFに出力する
+
+    Returns:
+        str | None: 補足メッセージ
+    """
+    # 表示シートのみを対象とする（xlSheetVisible = -1）
+    # xlwingsのSheetを経由せずCOMのSheetsを1回だけ走査し、シート名と表示状態は各1回だけ取得する
+    sheets = []
+    for sheet_api in book.api.Sheets:
+        if sheet_api.Visible == -1:
+            sheets.append((sheet_api.Name, sheet_api))
+    if not sheets:
+        return "変換スキップ（全シート非表示）"
+
+    with tempfile.TemporaryDirectory() as tmpdir_str:
+        tmpdir_path = Path(tmpdir_str)
+        # まずはブック全体を1回のエクスポートで出力する（シートごとの出力・結合より速い）
+        if not _export_book_at_once(book, sheets, pdf_path, tmpdir_path / f"{pdf_path.stem}.pdf"):
+            # ページ数からブックマークの位置が決まらない場合は、シートごとに出力して結合する
+            _export_sheets_and_merge(sheets, pdf_path, tmpdir_path)
+    return None
+
+
+def _convert_book(app, file: Path, pdf_path: Path, add_bookmarks: bool):
+    """
+    Excelでブックを開いてPDFに変換する
+
+    Returns:
+        str | None: 補足メッセージ
+    """
+    # 読み取り専用で開き、外部リンクの更新・読み取り専用推奨の確認・最近使ったファイルへの登録を行わない
+    # （読み取り専用なので、他のワーカーが同じファイルを同時に開いても書き込み予約で待たされない）
+    book = app.books.open(
+        file,
+        update_links=False,
+        read_only=True,
+        ignore_read_only_recommended=True,
+        notify=False,
+        add_to_mru=False,
+    )
+    try:
+        if add_bookmarks:
+            return _export_with_bookmarks(book, pdf_path)
+        book.to_pdf(path=pdf_path)
+        return None
+    finally:
+        # 閉じられなかった場合も変換結果（または変換時の例外）を優先する
+        try:
+            book.close()
+        except Exception:
+            pass
+
+
+def _convert_one(file: Path, pdf_path: Path, add_bookmarks: bool, local_cache: bool = True):
+    """
+    1つのExcelファイルをPDFに変換する（ワーカープロセスで実行）
+
+    local_cacheがTrueでExcelファイルがネットワーク上にある場合は、ローカルの一時フォルダに
+    コピーしてから変換する（Excelがネットワーク越しにファイルを少しずつ読み書きするより速く、失敗もしにくい）。
+
+    Returns:
+        tuple[Path, str | None, str | None]: (Excelファイル, エラーメッセージ, 補足メッセージ)
+    """
+    note = None
+    try:
+        app = _get_app()
+        if local_cache and is_network_path(file):
+            with tempfile.TemporaryDirectory() as tmpdir_str:
+                local_file = Path(tmpdir_str) / file.name
+                local_pdf = local_file.with_suffix(".pdf")
+                # 1回の連続コピーでローカルに取得し、変換後のPDFも1回でコピーする
+                shutil.copy2(file, local_file)
+                note = _convert_book(app, local_file, local_pdf, add_bookmarks)
+                if local_pdf.exists():
+                    shutil.copyfile(local_pdf, pdf_path)
+        else:
+            note = _convert_book(app, file, pdf_path, add_bookmarks)
+
+    except Exception as e:
+        return file, str(e), None
+    finally:
+        _release_after_convert()
+    return file, None, note
+
+
+def export_excels_to_pdf(
+    input_dir,
+    output_dir=None,
+    recursive=False,
+    add_bookmarks: bool = False,
+    max_workers: int | None = None,
+    local_cache: bool = True,
+):
     start_time = time.time()
     input_path = Path(input_dir).resolve()
     if not input_path.is_dir() and not input_path.is_file():
@@ -25,10 +381,7 @@ def export_excels_to_pdf(input_dir, output_dir=None, recursive=False, add_bookma
         input_path = input_path.parent
     else:
         # 対象ファイル一覧（再帰オプションあり）
-        pattern = "**/*.xls*" if recursive else "*.xls*"
-        excel_files = sorted(list(input_path.glob(pattern)))
-        # 一時ファイルを除外
-        excel_files = [f for f in excel_files if not f.name.startswith("~$")]
+        excel_files = sorted(iter_excel_files(input_path, recursive))
     total = len(excel_files)
     if total == 0:
         print("対象となるExcelファイルが見つかりません。")
@@ -36,78 +389,98 @@ def export_excels_to_pdf(input_dir, output_dir=None, recursive=False, add_bookma
 
     failed = []
 
+    # 前回までに変換したファイルの内容を読み込む
+    manifest_path = output_path / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+
     print("=== 一括PDF変換開始 ===")
     print(f"対象フォルダ: {input_path}")
     print(f"出力先フォルダ: {output_path}")
     print(f"対象ファイル数: {total}")
     print("----------------------------")
 
-    # Excelバックグラウンドインスタンス
-    app = xw.App(visible=False, add_book=False)
-    app.display_alerts = False
-    app.screen_updating = False
-
+    # 変換が必要なファイル: {Excelファイル: (マニフェストのキー, サイズ, ハッシュ値, PDFファイル)}
+    tasks = {}
+    # スキップしたファイル数（ファイルごとに出力せず、まとめて件数だけ出力する）
+    unchanged_count = 0
+    newer_count = 0
     try:
-        for i, file in enumerate(excel_files, start=1):
+        for file in excel_files:
             # 出力先の相対パス構造を維持
             rel_path = file.relative_to(input_path).with_suffix(".pdf")
             pdf_path = output_path / rel_path
             pdf_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # ExcelファイルよりもPDFファイルが新しい場合はスキップ
-            if pdf_path.exists() and pdf_path.stat().st_mtime >= file.stat().st_mtime:
-                print(f"[{i}/{total}] スキップ: {file} （PDFの方が新しい）")
-                continue
+            # 前回変換時とExcelファイルの内容・ブックマークの有無が同じ場合はスキップ
+            # （サイズとブックマークの有無が一致する場合のみハッシュ値を比較する）
+            key = str(file)
+            entry = manifest.get(key)
+            # stat()はファイルごとに1回だけ行う（ネットワークドライブでは特に高コスト）
+            file_stat = file.stat()
+            try:
+                pdf_stat = pdf_path.stat()
+            except FileNotFoundError:
+                pdf_stat = None
+            size = file_stat.st_size
+            digest = None
+            if pdf_stat is not None:
+                if entry is not None:
+                    # ブックマークの有無を記録していない古いエントリは再変換する
+                    if entry[0] == size and entry[2:] == [add_bookmarks]:
+                        digest = file_digest(file)
+                        if entry[1] == digest:
+                            unchanged_count += 1
+                            continue
+                # マニフェストに記録が無い場合は、ExcelファイルよりもPDFファイルが新しければスキップ
+                elif pdf_stat.st_mtime >= file_stat.st_mtime:
+                    newer_count += 1
+                    manifest[key] = [size, file_digest(file), add_bookmarks]
+                    continue
 
-            print(f"[{i}/{total}] 変換中: {file} → {pdf_path.name}")
+            tasks[file] = (key, size, digest, pdf_path)
 
-            try:
-                if add_bookmarks:
-                    with tempfile.TemporaryDirectory() as tmpdir_str:
-                        tmpdir_path = Path(tmpdir_str)
-                        book = app.books.open(file)
-                        merger = PdfMerger()
-
-                        try:
-                            for sheet in book.sheets:
-                                # xlSheetVisible = -1
-                                if sheet.api.Visible != -1:
-                                    continue  # 非表示シートはスキップ
-
-                                tmp_pdf = tmpdir_path / f"{sheet.name}.pdf"
-                                # 各シートを一時PDFとして保存
-                                sheet.api.ExportAsFixedFormat(0, str(tmp_pdf))
-                                # PyPDF2で追加＋ブックマーク
-                                merger.append(str(tmp_pdf), outline_item=sheet.name)
-
-                            if merger.pages:
-                                merger.write(pdf_path)
-                            else:
-                                print("  → 変換スキップ（全シート非表示）")
-
-                        finally:
-                            merger.close()
-                            book.close()
-
-                else:
-                    book = app.books.open(file)
-                    try:
-                        book.to_pdf(path=pdf_path)
-                    finally:
-                        book.close()
+        if unchanged_count or newer_count:
+            print(f"スキップ: {unchanged_count} 件（内容に変更なし） / {newer_count} 件（PDFの方が新しい）")
+
+        if tasks:
+            # 並列に起動するExcelインスタンス（ワーカープロセス）の数
+            # （変換するファイル数より多くExcelを起動しても遊ぶだけなので、ファイル数で頭打ちにする）
+            workers = max_workers if max_workers is not None else min(4, os.cpu_count() or 1)
+            workers = min(workers, len(tasks))
+            print(f"変換ファイル数: {len(tasks)} （並列数: {workers}）")
+
+            # 各ワーカーは起動時にExcelを1つ起動し、割り当てられたファイルを同じExcelで順に変換する
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                # 投入時にはファイルごとの出力を行わない（出力は完了時の1行だけにする）
+                # 完了したFutureから変換対象のファイルを引けるようにしておく
+                futures = {
+                    executor.submit(_convert_one, file, pdf_path, add_bookmarks, local_cache): file
+                    for file, (_, _, _, pdf_path) in tasks.items()
+                }
 
-            except Exception as e:
-                print(f"  ❌ 変換失敗: {file.name} ({e})")
-                failed.append(str(file))
+                # 完了したものから結果を集計
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        file, error, note = future.result()
+                    except Exception as e:
+                        # ワーカープロセスが異常終了した場合（BrokenProcessPool等）もファイル単位の失敗として扱う
+                        file, error, note = futures[future], e, None
+                    key, size, digest, _ = tasks[file]
+                    if error is not None:
+                        print(f"  ❌ 変換失敗 ({done}/{len(futures)}): {file.name} ({error})")
+                        failed.append(str(file))
+                        manifest.pop(key, None)
+                    else:
+                        print(f"  ✔ 変換完了 ({done}/{len(futures)}): {file.name}")
+                        if note:
+                            print(f"  → {note}")
+                        # 変換したExcelファイルの内容を記録
+                        manifest[key] = [size, digest or file_digest(file), add_bookmarks]
         print("\n=== 一括PDF変換完了 ===")
 
     finally:
-        # Excelプロセスを確実に終了
-        try:
-            app.quit()
-            del app
-        except Exception:
-            pass
+        # 変換結果をマニフェストに保存（中断した場合もそれまでの結果を残す）
+        save_manifest(manifest_path, manifest)
 
     # 処理時間
     elapsed = time.time() - start_time
@@ -123,7 +496,9 @@ def export_excels_to_pdf(input_dir, output_dir=None, recursive=False, add_bookma
         for f in failed:
             print(f"  - {f}")
 
-    # 通知
+    # 通知（plyerは通知を出すときだけ読み込む）
+    from plyer import notification  # type: ignore
+
     notification.notify(
         title="Excel → PDF 一括変換",
         message=f"完了: 成功 {success_count} / 失敗 {len(failed)}\n処理時間: {elapsed:.1f} 秒",
@@ -133,13 +508,17 @@ def export_excels_to_pdf(input_dir, output_dir=None, recursive=False, add_bookma
 
 
 def print_usage():
-    print("使い方: python export_excel_to_pdf.py <入力フォルダ> [-o <出力フォルダ>] [-r] [-b]")
+    print("使い方: python export_excel_to_pdf.py <入力フォルダ> [-o <出力フォルダ>] [-nr] [-nb] [-nc]")
     print("  -o: 出力フォルダ（省略時は入力フォルダと同じ）")
     print("  -nr: サブフォルダも再帰的に処理しない（省略時はする）")
     print("  -nb: 各シートをブックマーク付きでPDFに結合しない（省略時はする）")
+    print("  -nc: ネットワーク上のExcelファイルをローカルにコピーしてから変換しない（省略時はする）")
 
 
 if __name__ == "__main__":
+    # exe化した場合にワーカープロセスが正しく起動するようにする
+    multiprocessing.freeze_support()
+
     if len(sys.argv) < 2:
         print_usage()
         # ユーザ入力を待つ
@@ -150,14 +529,20 @@ if __name__ == "__main__":
     output_dir = None
     recursive = True
     add_bookmarks = True
+    local_cache = True
 
-    for arg in sys.argv[2:]:
+    args = sys.argv[2:]
+    it = iter(enumerate(args))
+    for i, arg in it:
         if arg == "-nr":
             recursive = False
         elif arg == "-nb":
             add_bookmarks = False
+        elif arg == "-nc":
+            local_cache = False
         elif arg == "-o":
-            if sys.argv.index(arg) + 1 < len(sys.argv):
-                output_dir = sys.argv[sys.argv.index(arg) + 1]
+            if i + 1 < len(args):
+                output_dir = args[i + 1]
+                next(it, None)  # 出力フォルダの値は読み飛ばす
 
-    export_excels_to_pdf(input_dir, output_dir, recursive, add_bookmarks)
+    export_excels_to_pdf(input_dir, output_dir, recursive, add_bookmarks, local_cache=local_cache)
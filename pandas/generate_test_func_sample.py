@@ -1,4 +1,5 @@
 import json
+import re
 
 # テスト仕様データ（例として直接記載。実際はファイルから読み込んでもOK）
 test_spec = {
@@ -90,84 +91,103 @@ test_spec = {
     ],
 }
 
+# 種別 → 内容を格納する変数名 (1件のみの種別)
+_SCALARS = {
+    "概要": "overview",
+    "観点": "viewpoint",
+    "前提条件": "precondition",
+    "手順_HTTPリクエスト": "http_req",
+    "判定方法_HTTPレスポンス": "http_resp",
+}
+# 種別 → 内容を格納する変数名 (複数件の種別)
+_BUCKETS = {
+    "事前準備_SQL": "setup_sql",
+    "判定方法_SQL": "judge_sql",
+}
+
+# HTTPリクエスト仕様の各行 ("URL=...", "METHOD=...", "POST_DATA=...")
+_HTTP_RE = re.compile(r"^(URL|METHOD|POST_DATA)=(.*)$", re.M)
+
 
 def parse_http_request(content):
     """HTTPリクエスト仕様からURL/METHOD/POST_DATAを抽出"""
-    lines = content.split("\n")
-    url, method, post_data = "", "", ""
-    for line in lines:
-        if line.startswith("URL="):
-            url = line[4:]
-        elif line.startswith("METHOD="):
-            method = line[7:]
-        elif line.startswith("POST_DATA="):
-            post_data = line[10:]
-    return url, method, post_data
+    values = {m.group(1): m.group(2) for m in _HTTP_RE.finditer(content)}
+    return values.get("URL", ""), values.get("METHOD", ""), values.get("POST_DATA", "")
 
 
 def generate_pytest_code(spec):
     code_lines = ["import pytest", "import requests", "", "# pytest自動生成コード", ""]
+    append_code = code_lines.append
     for item_key, steps in spec.items():
         # テスト関数名
         func_name = f"test_{item_key.replace('.', '_')}"
-        # コメント用
-        overview = ""
-        viewpoint = ""
-        precondition = ""
-        setup_sql = []
-        http_req = None
-        http_resp = None
-        judge_sql = []
+        # 種別ごとの内容 (1件のみの種別は上書き、複数件の種別はリストに追加)
+        scalars = {
+            "overview": "",
+            "viewpoint": "",
+            "precondition": "",
+            "http_req": None,
+            "http_resp": None,
+        }
+        buckets = {"setup_sql": [], "judge_sql": []}
         for step in steps:
-            if not step.get("種別"):
+            k = step.get("種別")
+            if not k:
                 continue
-            if step["種別"] == "概要":
-                overview = step["内容"]
-            elif step["種別"] == "観点":
-                viewpoint = step["内容"]
-            elif step["種別"] == "前提条件":
-                precondition = step["内容"]
-            elif step["種別"] == "事前準備_SQL":
-                setup_sql.append(step["内容"])
-            elif step["種別"] == "手順_HTTPリクエスト":
-                http_req = step["内容"]
-            elif step["種別"] == "判定方法_HTTPレスポンス":
-                http_resp = step["内容"]
-            elif step["種別"] == "判定方法_SQL":
-                judge_sql.append(step["内容"])
-        code_lines.append(f"def {func_name}():")
+            # 内容は対象の種別の場合のみ参照する (未知の種別は内容が無くてもスキップする)
+            name = _SCALARS.get(k)
+            if name is not None:
+                scalars[name] = step["内容"]
+            else:
+                name = _BUCKETS.get(k)
+                if name is not None:
+                    buckets[name].append(step["内容"])
+        overview = scalars["overview"]
+        viewpoint = scalars["viewpoint"]
+        precondition = scalars["precondition"]
+        http_req = scalars["http_req"]
+        http_resp = scalars["http_resp"]
+        setup_sql = buckets["setup_sql"]
+        judge_sql = buckets["judge_sql"]
+        # テスト関数1件分を1つの文字列として組み立てる
+        block = [f"def {func_name}():"]
+        add = block.append
         if overview:
-            code_lines.append(f"    '''{overview}'''")
+            add(f"    '''{overview}'''")
         if viewpoint:
-            code_lines.append(f"    # 観点: {viewpoint}")
+            add(f"    # 観点: {viewpoint}")
         if precondition:
-            code_lines.append(f"    # 前提条件: {precondition}")
+            add(f"    # 前提条件: {precondition}")
         if setup_sql:
-            code_lines.append("    # 事前準備SQL")
+            add("    # 事前準備SQL")
             for sql in setup_sql:
-                code_lines.append(f"    # 実行SQL: {sql}")
-                code_lines.append("    # db.execute(sql)  # ←実装例")
+                add(f"    # 実行SQL: {sql}\n    # db.execute(sql)  # ←実装例")
         if http_req:
             url, method, post_data = parse_http_request(http_req)
-            code_lines.append("    # HTTPリクエスト送信")
-            code_lines.append(f"    url = '{url}'")
-            code_lines.append(f"    method = '{method}'")
-            code_lines.append(f"    data = {post_data}")
-            code_lines.append(
-                "    # response = requests.request(method, url, json=data)"
+            add(
+                "    # HTTPリクエスト送信\n"
+                f"    url = '{url}'\n"
+                f"    method = '{method}'\n"
+                f"    data = {post_data}\n"
+                "    # response = requests.request(method, url, json=data)\n"
+                "    # assert response.status_code == 200"
             )
-            code_lines.append("    # assert response.status_code == 200")
         if http_resp:
-            code_lines.append("    # HTTPレスポンス判定")
-            code_lines.append(f"    expected_response = {http_resp}")
-            code_lines.append("    # assert response.json() == expected_response")
+            add(
+                "    # HTTPレスポンス判定\n"
+                f"    expected_response = {http_resp}\n"
+                "    # assert response.json() == expected_response"
+            )
         if judge_sql:
-            code_lines.append("    # 判定用SQL")
+            add("    # 判定用SQL")
             for sql in judge_sql:
-                code_lines.append(f"    # 判定SQL: {sql}")
-                code_lines.append("    # result = db.execute(sql)")
-                code_lines.append("    # assert ...  # 判定ロジックを記述")
-        code_lines.append("")
+                add(
+                    f"    # 判定SQL: {sql}\n"
+                    "    # result = db.execute(sql)\n"
+                    "    # assert ...  # 判定ロジックを記述"
+                )
+        add("")
+        append_code("\n".join(block))
     return "\n".join(code_lines)
 
 
@@ -1,6 +1,40 @@
 import json
+from collections import defaultdict
 
 import pandas as pd
+from python_calamine import CalamineWorkbook
+
+
+def _to_cell_value(value):
+    """calamineのセル値をopenpyxlと同じ形式に揃える (空セルはNone、整数値の実数はint)"""
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def read_excel_rows(file_path: str, sheet_name: str) -> tuple[list, list[tuple]]:
+    """
+    Excelのシートをcalamine(Rust実装)で1行ずつ読み込む
+
+    Returns:
+        tuple[list, list[tuple]]: (ヘッダー行, データ行のリスト)
+    """
+    wb = CalamineWorkbook.from_path(file_path)
+    try:
+        rows = wb.get_sheet_by_name(sheet_name).iter_rows()
+        header = [_to_cell_value(cell) for cell in next(rows)]
+        data = []
+        for row in rows:
+            values = tuple(_to_cell_value(cell) for cell in row)
+            # 空行(全セルが空)は除外
+            if any(cell is not None for cell in values):
+                data.append(values)
+    finally:
+        wb.close()
+    return header, data
+
 
 if __name__ == "__main__":
     # file_path = "data/sample.xlsx"
@@ -10,18 +44,29 @@ if __name__ == "__main__":
 
     try:
         # Read the Excel file
-        df = pd.read_excel(file_path, sheet_name=sheet_name, index_col=0, header=0)
-
-        if df is not None:
-            print("Data imported successfully:")
-            print(df.head())
-        else:
-            print("Failed to import data.")
+        header, rows = read_excel_rows(file_path, sheet_name)
+        print("Data imported successfully:")
     except Exception as e:
         print(f"Error importing Excel file: {e}")
+        raise
+
+    # 先頭列("No.")をインデックスとし、残りの列をレコードにする
+    index_name = header[0]
+    columns = header[1:]
+    records = []
+    # No.ごとにデータをグループ化 (読み込んだ行から直接作成)
+    nested_dict: dict = defaultdict(list)
+    for row in rows:
+        record = dict(zip(columns, row[1:]))
+        records.append(record)
+        nested_dict[row[0]].append(record)
+
+    # JSON(table形式)の出力のみDataFrameを使用
+    df = pd.DataFrame(rows, columns=header).set_index(index_name)
+    print(df.head())
 
     print("\nDictionary format:")
-    print(json.dumps(df.to_dict(orient="records"), indent=4, ensure_ascii=False))
+    print(json.dumps(records, indent=4, ensure_ascii=False))
 
     # output_json_path = None  # None to not save and return the data
     # output_str = df.to_json(
@@ -45,9 +90,5 @@ if __name__ == "__main__":
         indent=4,
     )
 
-    # No.ごとにデータをグループ化
-    nested_dict: dict = {}
-    for x, y in df.groupby("No.", group_keys=False):
-        nested_dict[x] = y.to_dict(orient="records")
     print("\nNested dictionary:")
     print(json.dumps(nested_dict, indent=4, ensure_ascii=False))
@@ -6,14 +6,24 @@ PDF文字列検索ツール
 """
 
 import argparse
+import bisect
 import csv
+import functools
+import multiprocessing
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import TextIO
+from typing import Callable, Iterable, Iterator, Sequence, TextIO
 
+import ahocorasick
 import fitz  # PyMuPDF
 
 
+def _no_fold(text: str) -> str:
+    """大文字・小文字を区別する場合の比較用文字列を返す（変換しない）。"""
+    return text
+
+
 def get_bookmarks(doc: fitz.Document) -> list[tuple[int, str]]:
     """
     PDFのブックマーク（目次）を取得し、ページ番号とタイトルのリストを返す。
@@ -96,54 +106,157 @@ def write_bookmark_list(
             writer.writerow(row)
 
 
-def find_nearest_bookmark(bookmarks: list[tuple[int, str]], page_num: int) -> str:
+def find_nearest_bookmark(
+    bm_pages: Sequence[int], bm_titles: Sequence[str], page_num: int
+) -> str:
     """
     指定ページに最も近い直前のブックマークを返す。
 
     Args:
-        bookmarks: (ページ番号, タイトル) のリスト
+        bm_pages: ブックマークのページ番号のリスト（昇順）
+        bm_titles: bm_pagesと同じ順序のブックマークタイトルのリスト
         page_num: 検索対象のページ番号（1始まり）
 
     Returns:
         直近のブックマークタイトル。なければ空文字列
     """
-    nearest = ""
-    for bm_page, bm_title in bookmarks:
-        if bm_page <= page_num:
-            nearest = bm_title
-        else:
-            break
-    return nearest
+    # ページ番号順のリストを二分探索し、page_num以下で最後のブックマークを求める
+    idx = bisect.bisect_right(bm_pages, page_num) - 1
+    return bm_titles[idx] if idx >= 0 else ""
 
 
-def extract_context(text: str, search_string: str, ignore_case: bool = False) -> str:
+def extract_context(lines: list[str], lines_cmp: list[str], needle: str) -> str:
     """
     検索文字列を含む行を抽出する。
 
+    行の分割と比較用テキストの作成はページごとに呼び出し元で一度だけ行う。
+
     Args:
-        text: 検索対象テキスト
-        search_string: 検索文字列
-        ignore_case: 大文字・小文字を区別しない場合はTrue
+        lines: 検索対象テキストを行単位に分割したリスト
+        lines_cmp: 比較用の行リスト（大文字・小文字を区別しない場合はcasefold済み）
+        needle: 比較用の検索文字列（大文字・小文字を区別しない場合はcasefold済み）
 
     Returns:
-        検索文字列を含む行（複数行の場合は改行で連結）
+        検索文字列を含む行（複数行の場合は空白で連結）
     """
-    lines = text.split("\n")
-    matched_lines: list[str] = []
-    for line in lines:
-        if ignore_case:
-            if search_string.lower() in line.lower():
-                matched_lines.append(line.strip())
-        else:
-            if search_string in line:
-                matched_lines.append(line.strip())
-    return " ".join(matched_lines)
+    return " ".join(
+        line.strip() for line, line_cmp in zip(lines, lines_cmp) if needle in line_cmp
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def build_automaton(needles: tuple[str, ...]) -> ahocorasick.Automaton:
+    """
+    検索文字列からAho-Corasickオートマトンを構築する。
+
+    全検索文字列を1回の走査で照合するため、プロセスごとに一度だけ構築して使い回す。
+
+    Args:
+        needles: 比較用の検索文字列（大文字・小文字を区別しない場合はcasefold済み）
+
+    Returns:
+        値に検索文字列を持つオートマトン
+    """
+    automaton = ahocorasick.Automaton()
+    for needle in needles:
+        automaton.add_word(needle, needle)
+    automaton.make_automaton()
+    return automaton
+
+
+def _search_doc(
+    doc: fitz.Document,
+    search_strings: list[str],
+    ignore_case: bool,
+    include_context: bool,
+) -> list[dict[str, str | int]]:
+    """
+    開いたPDFドキュメントを検索する（引数と戻り値は search_pdf と同じ）。
+    """
+    results: list[dict[str, str | int]] = []
+    # ブックマークはヒット箇所を求める場合のみ取得する
+    bookmarks = get_bookmarks(doc) if include_context else []
+
+    # 直近ブックマークの二分探索用に、ページ番号とタイトルを分けておく
+    bm_pages = [page for page, _ in bookmarks]
+    bm_titles = [title for _, title in bookmarks]
+
+    # 全ページを先に抽出して保持せず、1ページずつ抽出する
+    # （include_context=False の場合は、途中で残りのページの抽出を打ち切れる）
+    pages = (page.get_text() for page in doc)
+
+    # 比較用文字列への変換を最初に一度だけ決めておき、以降は大文字・小文字の区別で分岐しない
+    # （区別しない場合は lower より網羅的な casefold を使う。例: "ß" と "SS"）
+    fold: Callable[[str], str] = str.casefold if ignore_case else _no_fold
+
+    # 比較用の検索文字列は検索開始前に一度だけ作成する
+    needles = [fold(search_string) for search_string in search_strings]
+    automaton = build_automaton(tuple(needles))
+    needle_count = len(automaton)
+
+    # ページループ内で繰り返し参照する属性・組み合わせはループ前に束縛しておく
+    iter_matches = automaton.iter
+    append_result = results.append
+    needle_pairs = list(zip(search_strings, needles))
+
+    # include_context=False の場合に、このファイルでヒット済みの比較用検索文字列
+    found: set[str] = set()
+
+    for page_num, text in enumerate(pages, 1):
+        # 比較用テキストはページごとに一度だけ作成し、検索マッチの判定とヒット箇所の抽出の両方で使う
+        text_cmp = fold(text)
+
+        # 検索マッチの判定用に、改行を除去したテキストを作成する
+        # str.translate は非ASCII文字を含むテキストでは1文字ずつの変換になり大幅に遅いため、
+        # replace を使う（\r を含まない場合、2回目の replace は走査のみでコピーは発生しない）
+        flat = text_cmp.replace("\n", " ").replace("\r", " ")
+
+        # 全検索文字列を1回の走査で照合し、ヒットした検索文字列を集める
+        # すべての検索文字列がヒットした時点で残りの走査は打ち切る
+        matched: set[str] = set()
+        for _, needle in iter_matches(flat):
+            matched.add(needle)
+            if len(matched) == needle_count:
+                break
+        if not matched:
+            continue
+
+        if not include_context:
+            # ヒット箇所を求めない場合は、検索文字列ごとに最初のヒットだけ記録する
+            for search_string, needle in needle_pairs:
+                if needle in matched and needle not in found:
+                    append_result({"search_string": search_string, "page": page_num})
+            found |= matched
+            if len(found) == needle_count:
+                break
+            continue
+
+        # ヒット箇所の抽出用に、行分割と比較用テキストもページごとに一度だけ作成する
+        lines = text.split("\n")
+        # （casefold は改行を増減させないため、lines と行が一対一に対応する）
+        lines_cmp = text_cmp.split("\n") if text_cmp is not text else lines
+        bookmark = find_nearest_bookmark(bm_pages, bm_titles, page_num)
+
+        for search_string, needle in needle_pairs:
+            if needle in matched:
+                context = extract_context(lines, lines_cmp, needle)
+                append_result(
+                    {
+                        "search_string": search_string,
+                        "page": page_num,
+                        "bookmark": bookmark,
+                        "context": context,
+                    }
+                )
+
+    return results
 
 
 def search_pdf(
     pdf_path: Path,
     search_strings: list[str],
     ignore_case: bool = False,
+    include_context: bool = True,
 ) -> list[dict[str, str | int]]:
     """
     単一のPDFファイルを検索する。
@@ -152,53 +265,75 @@ def search_pdf(
         pdf_path: PDFファイルパス
         search_strings: 検索文字列のリスト
         ignore_case: 大文字・小文字を区別しない場合はTrue
+        include_context: ブックマーク・ヒット箇所を求める場合はTrue。
+            Falseの場合は検索文字列ごとに最初のヒットのみを返し、
+            全検索文字列がヒットした時点で残りのページの検索を打ち切る
 
     Returns:
         ヒット情報のリスト。各要素は以下のキーを持つ辞書:
         - search_string: 検索文字列
         - page: ページ番号（1始まり）
-        - bookmark: 直近のブックマーク
-        - context: ヒット箇所を含む文章
+        - bookmark: 直近のブックマーク（include_context=Trueの場合のみ）
+        - context: ヒット箇所を含む文章（include_context=Trueの場合のみ）
     """
-    results: list[dict[str, str | int]] = []
     try:
         doc = fitz.open(pdf_path)
     except Exception as e:
         print(f"警告: {pdf_path} を開けませんでした: {e}", file=sys.stderr)
-        return results
+        return []
 
-    bookmarks = get_bookmarks(doc)
+    # 検索中に例外が発生した場合もドキュメントを閉じる
+    try:
+        return _search_doc(doc, search_strings, ignore_case, include_context)
+    finally:
+        doc.close()
 
-    for page_num in range(1, len(doc) + 1):
-        page = doc[page_num - 1]
-        text = page.get_text()
-
-        for search_string in search_strings:
-            # 検索マッチの判定
-            # 改行は除去して検索
-            if ignore_case:
-                match_found = search_string.lower() in text.lower().replace(
-                    "\n", " "
-                ).replace("\r", " ")
-            else:
-                match_found = search_string in text.replace("\n", " ").replace(
-                    "\r", " "
-                )
 
-            if match_found:
-                context = extract_context(text, search_string, ignore_case)
-                bookmark = find_nearest_bookmark(bookmarks, page_num)
-                results.append(
-                    {
-                        "search_string": search_string,
-                        "page": page_num,
-                        "bookmark": bookmark,
-                        "context": context,
-                    }
-                )
+def iter_search_results(
+    pdf_files: list[Path],
+    search_strings: list[str],
+    ignore_case: bool = False,
+    include_context: bool = True,
+    max_workers: int | None = None,
+) -> Iterator[tuple[str, list[dict[str, str | int]]]]:
+    """
+    複数のPDFファイルを並列に検索し、ヒットしたファイルの結果を順に返す。
 
-    doc.close()
-    return results
+    ファイル単位で独立しているため、プロセスプールで並列に検索する
+    （PyMuPDFのテキスト抽出はGILを保持するためスレッドでは並列化されない）。
+    結果は検索が終わったものから pdf_files の順に返すため、全件をメモリに保持しない。
+    PDFファイルが1つだけの場合や max_workers が1の場合は、プロセスを起動せずに検索する。
+
+    Args:
+        pdf_files: PDFファイルパスのリスト
+        search_strings: 検索文字列のリスト
+        ignore_case: 大文字・小文字を区別しない場合はTrue
+        include_context: ブックマーク・ヒット箇所を求める場合はTrue
+        max_workers: 並列に検索するプロセス数（Noneの場合はCPUコア数）
+
+    Yields:
+        (ファイルパス, ヒット情報リスト) のタプル
+    """
+    search = functools.partial(
+        search_pdf,
+        search_strings=search_strings,
+        ignore_case=ignore_case,
+        include_context=include_context,
+    )
+    if len(pdf_files) <= 1 or max_workers == 1:
+        # 並列化できないため、ワーカープロセスの起動コストを払わずにこのプロセスで検索する
+        for pdf_file in pdf_files:
+            hits = search(pdf_file)
+            if hits:
+                yield str(pdf_file), hits
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for pdf_file, hits in zip(
+            pdf_files, executor.map(search, pdf_files, chunksize=4)
+        ):
+            if hits:
+                yield str(pdf_file), hits
 
 
 def collect_pdf_files(target: Path) -> list[Path]:
@@ -240,7 +375,7 @@ def load_search_strings(file_path: Path) -> list[str]:
 
 
 def write_results(
-    results: list[tuple[str, list[dict[str, str | int]]]],
+    results: Iterable[tuple[str, list[dict[str, str | int]]]],
     base_path: Path,
     output: TextIO,
     verbose: bool = False,
@@ -248,8 +383,10 @@ def write_results(
     """
     検索結果をCSV形式で出力する。
 
+    resultsにイテレータを渡した場合は、受け取ったファイルの結果から順に書き出す。
+
     Args:
-        results: (ファイルパス, ヒット情報リスト) のタプルリスト
+        results: (ファイルパス, ヒット情報リスト) のタプルのイテラブル
         base_path: 相対パス計算の基準となるパス
         output: 出力先（ファイルまたはstdout）
         verbose: 詳細出力フラグ
@@ -301,6 +438,17 @@ def write_results(
                     writer.writerow(row)
 
 
+def _positive_int(value: str) -> int:
+    """1以上の整数を受け付ける argparse 用の型変換関数"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"整数を指定してください: {value}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1以上の整数を指定してください: {value}")
+    return number
+
+
 def main() -> None:
     """メイン関数"""
     parser = argparse.ArgumentParser(
@@ -335,6 +483,13 @@ def main() -> None:
         "--encoding",
         help="出力ファイルのエンコーディング（-oあり時のデフォルト: shift_jis、標準出力時: utf-8）",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=None,
+        help="並列に検索するプロセス数（省略時はCPUコア数）",
+    )
 
     args = parser.parse_args()
 
@@ -407,11 +562,15 @@ def main() -> None:
         return
 
     # 検索実行
-    all_results: list[tuple[str, list[dict[str, str | int]]]] = []
-    for pdf_file in pdf_files:
-        hits = search_pdf(pdf_file, search_strings, ignore_case=args.ignore_case)
-        if hits:
-            all_results.append((str(pdf_file), hits))
+    # 検索が終わったファイルから順にCSVへ書き出す
+    # ブックマーク・ヒット箇所は詳細出力の場合のみ求める
+    all_results = iter_search_results(
+        pdf_files,
+        search_strings,
+        ignore_case=args.ignore_case,
+        include_context=args.verbose,
+        max_workers=args.jobs,
+    )
 
     # 結果出力
     if args.output:
@@ -438,4 +597,6 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    # PyInstallerでexe化した場合に子プロセスが再度mainを実行しないようにする
+    multiprocessing.freeze_support()
     main()
@@ -7,19 +7,65 @@ WSDL Parser - SOAPのWSDLファイルを解析して読みやすく出力する
   python wsdl_parser.py <URL>
   python wsdl_parser.py <wsdlファイルのパス> --output result.html
   python wsdl_parser.py <wsdlファイルのパス> --format text
+  python wsdl_parser.py <wsdlファイルのパス> --format json --output result.json
 
 必要なライブラリ:
   pip install lxml requests
+  pip install orjson  # 任意（JSON出力を高速化）
 """
 
 import argparse
+import io
+import json
 import sys
+from functools import lru_cache
+from html import escape
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from urllib.parse import urlparse
 
 import requests
 from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # orjsonが無い場合は標準のjsonモジュールで出力する
+    orjson = None  # type: ignore
+
+
+@lru_cache(maxsize=None)
+def _strip_namespace(qname: str) -> str:
+    """名前空間プレフィックスを削除（同じQNameが何度も現れるため結果をキャッシュする）
+
+    型名などは出力時にリンク先の辞書を引くキーになるため、intern して同じ文字列オブジェクトを共有する
+    （プレフィックスが異なるQNameから得た同じ名前も、比較が参照の一致だけで済む）。
+    """
+    if ":" in qname:
+        return sys.intern(qname.split(":")[-1])
+    return sys.intern(qname)
+
+
+# complexTypeのフィールドの列（フィールドごとのdictではなく、列ごとのリストで保持する）
+_ELEMENT_COLUMNS = (
+    "name",
+    "type",
+    "minOccurs",
+    "maxOccurs",
+    "nillable",
+    "documentation",
+)
+
+
+def _new_element_columns() -> Dict[str, List[Any]]:
+    """complexTypeのフィールドを保持する、列ごとの空のリストを作成"""
+    return {column: [] for column in _ELEMENT_COLUMNS}
+
+
+def _iter_element_rows(columns: Dict[str, List[Any]]):
+    """complexTypeのフィールドを1行ずつ (名前, 型, minOccurs, maxOccurs, nillable, 説明) で返す"""
+    return zip(*(columns[column] for column in _ELEMENT_COLUMNS))
 
 
 class WSDLParser:
@@ -33,23 +79,90 @@ class WSDLParser:
         "http": "http://schemas.xmlsoap.org/wsdl/http/",
     }
 
+    # WSDLの読み込みに使うパーサー（大きなWSDLも読み込めるようにし、使わないID属性の収集を省く）
+    _PARSER = etree.XMLParser(huge_tree=True, collect_ids=False)
+
+    # 要素ごとに繰り返し評価するXPathは事前にコンパイルしておく（呼び出しごとの式の解析・名前空間の解決を省く）
+    # テキストノードを直接取得する（documentation要素のラッパーを生成しない）
+    _XP_XSD_DOC = etree.XPath(
+        "./xsd:annotation/xsd:documentation/text()",
+        namespaces=NAMESPACES,
+        smart_strings=False,
+    )
+    _XP_ANNOTATION_DOC = etree.XPath(
+        "./xsd:documentation/text()", namespaces=NAMESPACES, smart_strings=False
+    )
+
+    # 文書全体を対象とするXPath（読み込んだ文書に結び付けたXPathEvaluatorで評価する）
+    _XPATH_SERVICES = "//wsdl:service"
+    _XPATH_BINDINGS = "//wsdl:binding"
+    _XPATH_PORTTYPES = "//wsdl:portType"
+    _XPATH_MESSAGES = "//wsdl:message"
+    _XPATH_SCHEMA = "//wsdl:types/xsd:schema"
+
+    # 子要素・子孫要素をタグで絞り込むためのClark表記のタグ名
+    # （XPathエンジンを使わずにlxmlのツリーを直接たどる）
+    _WSDL_TYPES = f"{{{NAMESPACES['wsdl']}}}types"
+    _WSDL_SERVICE = f"{{{NAMESPACES['wsdl']}}}service"
+    _WSDL_BINDING = f"{{{NAMESPACES['wsdl']}}}binding"
+    _WSDL_PORTTYPE = f"{{{NAMESPACES['wsdl']}}}portType"
+    _WSDL_MESSAGE = f"{{{NAMESPACES['wsdl']}}}message"
+    _WSDL_PORT = f"{{{NAMESPACES['wsdl']}}}port"
+    _WSDL_OPERATION = f"{{{NAMESPACES['wsdl']}}}operation"
+    _WSDL_PART = f"{{{NAMESPACES['wsdl']}}}part"
+    _SOAP_ADDR = f"{{{NAMESPACES['soap']}}}address"
+    _SOAP12_ADDR = f"{{{NAMESPACES['soap12']}}}address"
+    _XSD_SCHEMA = f"{{{NAMESPACES['xsd']}}}schema"
+    _XSD_ELEMENT = f"{{{NAMESPACES['xsd']}}}element"
+    _XSD_COMPLEX_TYPE = f"{{{NAMESPACES['xsd']}}}complexType"
+    _XSD_ANNOTATION = f"{{{NAMESPACES['xsd']}}}annotation"
+
+    # URLからの取得に使うHTTPセッション（接続を再利用する）
+    _session: requests.Session | None = None
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        """HTTPセッションを取得する（初回のみ作成）
+
+        接続エラーと 502/503/504 の場合は、間隔を広げながら最大3回リトライする。
+        """
+        if cls._session is None:
+            retry = Retry(
+                total=3,
+                backoff_factor=1,
+                status_forcelist=[502, 503, 504],
+                # リトライしきれなかった場合は、最後のレスポンスのステータスでエラーにする
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            cls._session = session
+        return cls._session
+
     def __init__(self, wsdl_source: str):
         """
         Args:
             wsdl_source: WSDLファイルのパスまたはURL
         """
         self.wsdl_source = wsdl_source
-        self.tree: etree._Element | etree._ElementTree | None = None
+        self.tree: etree._ElementTree | None = None
         self.root: etree._Element | None = None
+        self._evaluator: etree.XPathElementEvaluator | None = None
         self.target_namespace: str | None = None
 
-    def load_wsdl(self) -> bool:
-        """WSDLファイルをロードする"""
+    def _read_source(self, read: Callable[[Any], None]) -> bool:
+        """WSDLファイルを開いて読み込む
+
+        Args:
+            read: 読み込み処理（ファイルパスまたはファイルライクオブジェクトを受け取る）
+        """
         try:
             # URLかローカルファイルかを判定
             parsed_url = urlparse(self.wsdl_source)
             if parsed_url.scheme in ["http", "https"]:
-                print(f"URLからWSDLを取得中: {self.wsdl_source}")
+                print(f"URLからWSDLを取得中: {self.wsdl_source}", file=sys.stderr)
                 # ブラウザを模倣したヘッダーを設定
                 headers = {
                     "User-Agent": (
@@ -59,298 +172,350 @@ class WSDLParser:
                     ),
                     "Accept": "text/xml, application/xml, */*",
                 }
-                # リトライ機能（接続エラー時に最大3回試行）
-                max_retries = 3
-                last_error: Exception | None = None
-                for attempt in range(max_retries):
-                    try:
-                        response = requests.get(
-                            self.wsdl_source,
-                            headers=headers,
-                            timeout=30,
-                            verify=True,
-                        )
-                        response.raise_for_status()
-                        self.tree = etree.fromstring(response.content)
-                        self.root = self.tree
-                        break
-                    except requests.exceptions.ConnectionError as e:
-                        last_error = e
-                        if attempt < max_retries - 1:
-                            print(
-                                f"  接続エラー、リトライ中... "
-                                f"({attempt + 1}/{max_retries})"
-                            )
-                            import time
-
-                            time.sleep(1)  # 1秒待機してリトライ
-                        else:
-                            raise
-                else:
-                    if last_error:
-                        raise last_error
+                # レスポンス全体をbytesとして保持せず、受信しながらパーサーに渡す
+                # （接続エラー時などのリトライはセッションのHTTPAdapterが行う）
+                with self._get_session().get(
+                    self.wsdl_source,
+                    headers=headers,
+                    timeout=30,
+                    verify=True,
+                    stream=True,
+                ) as response:
+                    response.raise_for_status()
+                    response.raw.decode_content = True
+                    read(response.raw)
             else:
-                print(f"ローカルファイルを読み込み中: {self.wsdl_source}")
-                self.tree = etree.parse(self.wsdl_source)
-                self.root = self.tree.getroot()
+                print(
+                    f"ローカルファイルを読み込み中: {self.wsdl_source}", file=sys.stderr
+                )
+                read(self.wsdl_source)
 
-            self.target_namespace = self.root.get("targetNamespace", "")
-            print("✓ WSDLファイルの読み込みに成功しました\n")
+            print("✓ WSDLファイルの読み込みに成功しました\n", file=sys.stderr)
             return True
         except requests.RequestException as e:
-            print(f"エラー: URLからWSDLを取得できませんでした - {e}")
+            print(f"エラー: URLからWSDLを取得できませんでした - {e}", file=sys.stderr)
             return False
         except etree.XMLSyntaxError as e:
-            print(f"エラー: XMLの解析に失敗しました - {e}")
+            print(f"エラー: XMLの解析に失敗しました - {e}", file=sys.stderr)
             return False
         except FileNotFoundError:
-            print(f"エラー: ファイルが見つかりません - {self.wsdl_source}")
+            print(
+                f"エラー: ファイルが見つかりません - {self.wsdl_source}",
+                file=sys.stderr,
+            )
             return False
         except Exception as e:
-            print(f"エラー: WSDLファイルの読み込みに失敗しました - {e}")
+            print(
+                f"エラー: WSDLファイルの読み込みに失敗しました - {e}", file=sys.stderr
+            )
             return False
 
+    def load_wsdl(self) -> bool:
+        """WSDLファイルをロードする"""
+
+        def read(source: Any) -> None:
+            self.tree = etree.parse(source, self._PARSER)
+            self.root = self.tree.getroot()
+            self.target_namespace = self.root.get("targetNamespace", "")
+            # 名前空間の設定と文書の評価コンテキストを、同じ文書に対するXPathで共有する
+            self._evaluator = etree.XPathEvaluator(
+                self.root, namespaces=self.NAMESPACES
+            )
+
+        return self._read_source(read)
+
     def _get_elements(self, xpath: str) -> Any:
-        """XPathでエレメントを取得"""
-        if self.root is None:
+        """読み込んだ文書全体からXPathでエレメントを取得"""
+        if self._evaluator is None:
             return []
-        return self.root.xpath(xpath, namespaces=self.NAMESPACES)
+        return self._evaluator(xpath)
+
+    def _parse_service(self, service: etree._Element) -> Dict[str, Any]:
+        """wsdl:service要素を解析"""
+        service_info = {"name": service.get("name"), "ports": []}
+
+        for port in service.iterchildren(self._WSDL_PORT):
+            port_info = {
+                "name": port.get("name"),
+                "binding": _strip_namespace(port.get("binding", "")),
+                "address": "",
+            }
+
+            # SOAP 1.1
+            soap_address = next(port.iter(self._SOAP_ADDR), None)
+            if soap_address is not None:
+                port_info["address"] = soap_address.get("location", "")
+
+            # SOAP 1.2
+            soap12_address = next(port.iter(self._SOAP12_ADDR), None)
+            if soap12_address is not None:
+                port_info["address"] = soap12_address.get("location", "")
+
+            service_info["ports"].append(port_info)
+
+        return service_info
 
     def parse_services(self) -> List[Dict[str, Any]]:
         """サービス情報を解析"""
-        services = []
-        for service in self._get_elements("//wsdl:service"):
-            service_info = {"name": service.get("name"), "ports": []}
-
-            for port in service.xpath(".//wsdl:port", namespaces=self.NAMESPACES):
-                port_info = {
-                    "name": port.get("name"),
-                    "binding": self._strip_namespace(port.get("binding")),
-                    "address": "",
-                }
+        return [
+            self._parse_service(service)
+            for service in self._get_elements(self._XPATH_SERVICES)
+        ]
+
+    def _parse_binding(self, binding: etree._Element) -> Dict[str, Any]:
+        """wsdl:binding要素を解析"""
+        binding_info = {
+            "name": binding.get("name"),
+            "type": _strip_namespace(binding.get("type", "")),
+            "style": "",
+            "transport": "",
+            "operations": [],
+        }
 
-                # SOAP 1.1
-                soap_address = port.xpath(".//soap:address", namespaces=self.NAMESPACES)
-                if soap_address:
-                    port_info["address"] = soap_address[0].get("location", "")
+        # SOAP Binding（最初に見つかった要素だけを使うため、find()で探索を打ち切る）
+        soap_binding = binding.find(".//soap:binding", self.NAMESPACES)
+        if soap_binding is not None:
+            binding_info["style"] = soap_binding.get("style", "document")
+            binding_info["transport"] = soap_binding.get("transport", "")
 
-                # SOAP 1.2
-                soap12_address = port.xpath(
-                    ".//soap12:address", namespaces=self.NAMESPACES
-                )
-                if soap12_address:
-                    port_info["address"] = soap12_address[0].get("location", "")
+        # Operations
+        for operation in binding.iterchildren(self._WSDL_OPERATION):
+            op_info = {"name": operation.get("name"), "soapAction": ""}
 
-                service_info["ports"].append(port_info)
+            soap_op = operation.find(".//soap:operation", self.NAMESPACES)
+            if soap_op is not None:
+                op_info["soapAction"] = soap_op.get("soapAction", "")
 
-            services.append(service_info)
+            binding_info["operations"].append(op_info)
 
-        return services
+        return binding_info
 
     def parse_bindings(self) -> List[Dict[str, Any]]:
         """バインディング情報を解析"""
-        bindings = []
-        for binding in self._get_elements("//wsdl:binding"):
-            binding_info = {
-                "name": binding.get("name"),
-                "type": self._strip_namespace(binding.get("type")),
-                "style": "",
-                "transport": "",
-                "operations": [],
+        return [
+            self._parse_binding(binding)
+            for binding in self._get_elements(self._XPATH_BINDINGS)
+        ]
+
+    def _parse_port_type(self, port_type: etree._Element) -> Dict[str, Any]:
+        """wsdl:portType要素を解析"""
+        pt_info = {"name": port_type.get("name"), "operations": []}
+
+        for operation in port_type.iterchildren(self._WSDL_OPERATION):
+            op_info = {
+                "name": operation.get("name"),
+                "documentation": "",
+                "input": "",
+                "output": "",
             }
 
-            # SOAP Binding
-            soap_binding = binding.xpath(".//soap:binding", namespaces=self.NAMESPACES)
-            if soap_binding:
-                binding_info["style"] = soap_binding[0].get("style", "document")
-                binding_info["transport"] = soap_binding[0].get("transport", "")
+            # Documentation
+            doc = operation.find(".//wsdl:documentation", self.NAMESPACES)
+            if doc is not None and doc.text:
+                op_info["documentation"] = doc.text.strip()
 
-            # Operations
-            for operation in binding.xpath(
-                ".//wsdl:operation", namespaces=self.NAMESPACES
-            ):
-                op_info = {"name": operation.get("name"), "soapAction": ""}
+            # Input
+            input_elem = operation.find(".//wsdl:input", self.NAMESPACES)
+            if input_elem is not None:
+                op_info["input"] = _strip_namespace(input_elem.get("message", ""))
 
-                soap_op = operation.xpath(
-                    ".//soap:operation", namespaces=self.NAMESPACES
-                )
-                if soap_op:
-                    op_info["soapAction"] = soap_op[0].get("soapAction", "")
+            # Output
+            output_elem = operation.find(".//wsdl:output", self.NAMESPACES)
+            if output_elem is not None:
+                op_info["output"] = _strip_namespace(output_elem.get("message", ""))
 
-                binding_info["operations"].append(op_info)
+            pt_info["operations"].append(op_info)
 
-            bindings.append(binding_info)
-
-        return bindings
+        return pt_info
 
     def parse_port_types(self) -> List[Dict[str, Any]]:
         """ポートタイプ（インターフェース）を解析"""
-        port_types = []
-        for port_type in self._get_elements("//wsdl:portType"):
-            pt_info = {"name": port_type.get("name"), "operations": []}
-
-            for operation in port_type.xpath(
-                ".//wsdl:operation", namespaces=self.NAMESPACES
-            ):
-                op_info = {
-                    "name": operation.get("name"),
-                    "documentation": "",
-                    "input": "",
-                    "output": "",
-                }
-
-                # Documentation
-                doc = operation.xpath(
-                    ".//wsdl:documentation", namespaces=self.NAMESPACES
-                )
-                if doc and doc[0].text:
-                    op_info["documentation"] = doc[0].text.strip()
-
-                # Input
-                input_elem = operation.xpath(
-                    ".//wsdl:input", namespaces=self.NAMESPACES
-                )
-                if input_elem:
-                    op_info["input"] = self._strip_namespace(
-                        input_elem[0].get("message", "")
-                    )
-
-                # Output
-                output_elem = operation.xpath(
-                    ".//wsdl:output", namespaces=self.NAMESPACES
-                )
-                if output_elem:
-                    op_info["output"] = self._strip_namespace(
-                        output_elem[0].get("message", "")
-                    )
-
-                pt_info["operations"].append(op_info)
-
-            port_types.append(pt_info)
+        return [
+            self._parse_port_type(port_type)
+            for port_type in self._get_elements(self._XPATH_PORTTYPES)
+        ]
+
+    def _parse_message(self, message: etree._Element) -> Dict[str, Any]:
+        """wsdl:message要素を解析"""
+        msg_info = {"name": message.get("name"), "parts": []}
+
+        for part in message.iterchildren(self._WSDL_PART):
+            part_info = {
+                "name": part.get("name"),
+                "element": _strip_namespace(part.get("element", "")),
+                "type": _strip_namespace(part.get("type", "")),
+            }
+            msg_info["parts"].append(part_info)
 
-        return port_types
+        return msg_info
 
     def parse_messages(self) -> List[Dict[str, Any]]:
         """メッセージ定義を解析"""
-        messages = []
-        for message in self._get_elements("//wsdl:message"):
-            msg_info = {"name": message.get("name"), "parts": []}
-
-            for part in message.xpath(".//wsdl:part", namespaces=self.NAMESPACES):
-                part_info = {
-                    "name": part.get("name"),
-                    "element": self._strip_namespace(part.get("element", "")),
-                    "type": self._strip_namespace(part.get("type", "")),
-                }
-                msg_info["parts"].append(part_info)
-
-            messages.append(msg_info)
-
-        return messages
+        return [
+            self._parse_message(message)
+            for message in self._get_elements(self._XPATH_MESSAGES)
+        ]
 
     def _get_documentation(self, element: etree._Element) -> str:
         """annotation/documentation要素からドキュメント文字列を取得"""
-        doc_result = element.xpath(
-            "./xsd:annotation/xsd:documentation", namespaces=self.NAMESPACES
-        )
-        if isinstance(doc_result, list) and len(doc_result) > 0:
-            doc_elem = doc_result[0]
-            if isinstance(doc_elem, etree._Element) and doc_elem.text:
-                return doc_elem.text.strip()
-        return ""
-
-    def parse_types(self) -> List[Dict[str, Any]]:
-        """データ型定義を解析"""
+        doc_result = self._XP_XSD_DOC(element)
+        return doc_result[0].strip() if doc_result else ""
+
+    def _append_element(
+        self, columns: Dict[str, List[Any]], element: etree._Element
+    ) -> None:
+        """complexTypeのフィールド（xsd:element要素）を列ごとのリストに追加"""
+        columns["name"].append(element.get("name"))
+        columns["type"].append(_strip_namespace(element.get("type", "")))
+        columns["minOccurs"].append(element.get("minOccurs", "1"))
+        columns["maxOccurs"].append(element.get("maxOccurs", "1"))
+        columns["nillable"].append(element.get("nillable", "false"))
+        columns["documentation"].append(self._get_documentation(element))
+
+    def _parse_schema(self, schema: etree._Element) -> List[Dict[str, Any]]:
+        """xsd:schema要素のデータ型定義を解析"""
         types_list = []
 
-        for schema in self._get_elements("//wsdl:types/xsd:schema"):
-            # 名前付きComplex Types
-            for complex_type in schema.xpath(
-                ".//xsd:complexType[@name]", namespaces=self.NAMESPACES
-            ):
-                type_name = complex_type.get("name")
+        # 名前付きComplex Types
+        for complex_type in schema.iter(self._XSD_COMPLEX_TYPE):
+            type_name = complex_type.get("name")
+            if type_name is None:
+                continue
+            type_info = {
+                "name": type_name,
+                "type": "complexType",
+                "documentation": self._get_documentation(complex_type),
+                "elements": _new_element_columns(),
+            }
+
+            for element in complex_type.iter(self._XSD_ELEMENT):
+                self._append_element(type_info["elements"], element)
+
+            types_list.append(type_info)
+
+        # スキーマ直下のElement（complexTypeを内包するものと単純なもの）
+        for element in schema.iterchildren(self._XSD_ELEMENT):
+            elem_name = element.get("name")
+            if not elem_name:
+                continue
+
+            # 要素のドキュメントを取得
+            elem_doc = self._get_documentation(element)
+
+            # 要素内に無名のcomplexTypeがあるかチェック
+            inner_complex = element.find(self._XSD_COMPLEX_TYPE)
+            if inner_complex is not None:
+                # 無名complexTypeを要素名でcomplexTypeとして登録
+                # 無名complexType自体のドキュメントとフィールドは、子要素を1回たどって集める
+                inner_doc = ""
+                columns = _new_element_columns()
+                for child in inner_complex.iterchildren(etree.Element):
+                    if child.tag == self._XSD_ANNOTATION:
+                        doc_result = self._XP_ANNOTATION_DOC(child)
+                        if doc_result and not inner_doc:
+                            inner_doc = doc_result[0].strip()
+                        continue
+                    for inner_elem in child.iter(self._XSD_ELEMENT):
+                        self._append_element(columns, inner_elem)
                 type_info = {
-                    "name": type_name,
+                    "name": elem_name,
                     "type": "complexType",
-                    "documentation": self._get_documentation(complex_type),
-                    "elements": [],
+                    "documentation": elem_doc or inner_doc,
+                    "elements": columns,
+                }
+                types_list.append(type_info)
+            else:
+                # 単純なelement
+                elem_info = {
+                    "name": elem_name,
+                    "type": "element",
+                    "dataType": _strip_namespace(element.get("type", "")),
+                    "documentation": elem_doc,
                 }
+                types_list.append(elem_info)
 
-                for element in complex_type.xpath(
-                    ".//xsd:element", namespaces=self.NAMESPACES
-                ):
-                    elem_info = {
-                        "name": element.get("name"),
-                        "type": self._strip_namespace(element.get("type", "")),
-                        "minOccurs": element.get("minOccurs", "1"),
-                        "maxOccurs": element.get("maxOccurs", "1"),
-                        "nillable": element.get("nillable", "false"),
-                        "documentation": self._get_documentation(element),
-                    }
-                    type_info["elements"].append(elem_info)
+        return types_list
 
-                types_list.append(type_info)
+    def parse_types(self) -> List[Dict[str, Any]]:
+        """データ型定義を解析"""
+        types_list = []
+        for schema in self._get_elements(self._XPATH_SCHEMA):
+            types_list.extend(self._parse_schema(schema))
+        return types_list
 
-            # スキーマ直下のElement（complexTypeを内包するものと単純なもの）
-            for element in schema.xpath("./xsd:element", namespaces=self.NAMESPACES):
-                elem_name = element.get("name")
-                if not elem_name:
-                    continue
+    def parse_stream(self) -> Optional[Dict[str, Any]]:
+        """WSDLを読み込みながら、1回の走査で全体を解析
 
-                # 要素のドキュメントを取得
-                elem_doc = self._get_documentation(element)
+        要素の終了タグを読み込んだ時点で解析し、解析済みの部分木はすぐに破棄する
+        （XPathによる文書全体の検索を定義の種類ごとに繰り返さず、大きなWSDLもメモリを抑えて解析できる）。
+        """
+        data: Dict[str, Any] = {
+            "target_namespace": "",
+            "services": [],
+            "bindings": [],
+            "port_types": [],
+            "messages": [],
+            "types": [],
+        }
+        # 要素のタグ → (解析処理, 解析結果の追加先)
+        handlers = {
+            self._WSDL_SERVICE: (self._parse_service, data["services"]),
+            self._WSDL_BINDING: (self._parse_binding, data["bindings"]),
+            self._WSDL_PORTTYPE: (self._parse_port_type, data["port_types"]),
+            self._WSDL_MESSAGE: (self._parse_message, data["messages"]),
+        }
 
-                # 要素内に無名のcomplexTypeがあるかチェック
-                inner_complex = element.xpath(
-                    "./xsd:complexType", namespaces=self.NAMESPACES
-                )
-                if inner_complex:
-                    # 無名complexTypeを要素名でcomplexTypeとして登録
-                    # 無名complexType自体のドキュメントも確認
-                    inner_doc = self._get_documentation(inner_complex[0])
-                    type_info = {
-                        "name": elem_name,
-                        "type": "complexType",
-                        "documentation": elem_doc or inner_doc,
-                        "elements": [],
-                    }
-                    for inner_elem in inner_complex[0].xpath(
-                        ".//xsd:element", namespaces=self.NAMESPACES
-                    ):
-                        inner_elem_info = {
-                            "name": inner_elem.get("name"),
-                            "type": self._strip_namespace(inner_elem.get("type", "")),
-                            "minOccurs": inner_elem.get("minOccurs", "1"),
-                            "maxOccurs": inner_elem.get("maxOccurs", "1"),
-                            "nillable": inner_elem.get("nillable", "false"),
-                            "documentation": self._get_documentation(inner_elem),
-                        }
-                        type_info["elements"].append(inner_elem_info)
-                    types_list.append(type_info)
+        def read(source: Any) -> None:
+            context = etree.iterparse(
+                source,
+                events=("end",),
+                tag=(*handlers, self._XSD_SCHEMA),
+                huge_tree=True,
+                collect_ids=False,
+            )
+            for _, elem in context:
+                if elem.tag == self._XSD_SCHEMA:
+                    # wsdl:types直下のスキーマのみを対象とする
+                    parent = elem.getparent()
+                    if parent is None or parent.tag != self._WSDL_TYPES:
+                        continue
+                    data["types"].extend(self._parse_schema(elem))
                 else:
-                    # 単純なelement
-                    elem_info = {
-                        "name": elem_name,
-                        "type": "element",
-                        "dataType": self._strip_namespace(element.get("type", "")),
-                        "documentation": elem_doc,
-                    }
-                    types_list.append(elem_info)
+                    parse_element, results = handlers[elem.tag]
+                    results.append(parse_element(elem))
 
-        return types_list
+                # 解析済みの部分木と、それより前の兄弟要素を破棄する
+                elem.clear(keep_tail=True)
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+
+            root = context.root
+            data["target_namespace"] = root.get("targetNamespace", "")
+
+        if not self._read_source(read):
+            return None
+        self.target_namespace = data["target_namespace"]
+        return data
+
+    def parse(self, stream: bool = True) -> Optional[Dict[str, Any]]:
+        """WSDL全体を解析
 
-    def _strip_namespace(self, qname: Optional[str]) -> str:
-        """名前空間プレフィックスを削除"""
-        if qname and ":" in qname:
-            return qname.split(":")[-1]
-        return qname or ""
+        Args:
+            stream: Trueの場合は読み込みながら1回の走査で解析する。
+                Falseの場合は文書全体を読み込んでから、定義の種類ごとにXPathで解析する。
+        """
+        if stream:
+            print("WSDLを解析中...", file=sys.stderr)
+            data = self.parse_stream()
+            if data is None:
+                return None
+            print("✓ 解析完了\n", file=sys.stderr)
+            return data
 
-    def parse(self) -> Optional[Dict[str, Any]]:
-        """WSDL全体を解析"""
         if not self.load_wsdl():
             return None
 
-        print("WSDLを解析中...")
+        print("WSDLを解析中...", file=sys.stderr)
         data = {
             "target_namespace": self.target_namespace,
             "services": self.parse_services(),
@@ -359,82 +524,91 @@ class WSDLParser:
             "messages": self.parse_messages(),
             "types": self.parse_types(),
         }
-        print("✓ 解析完了\n")
+        print("✓ 解析完了\n", file=sys.stderr)
         return data
 
 
+def _build_soap_action_map(data: Dict[str, Any]) -> Dict[tuple, List[str]]:
+    """(ポートタイプ名, オペレーション名) からSOAPActionの一覧を引く辞書を作成
+
+    オペレーションごとにバインディングを総当たりで探さずに済むよう、事前に1回だけ作成する。
+    同じポートタイプに複数のバインディングがある場合は、出現順にすべてのSOAPActionを保持する。
+    """
+    soap_action_map: Dict[tuple, List[str]] = {}
+    for binding in data["bindings"]:
+        for bind_op in binding["operations"]:
+            if bind_op["soapAction"]:
+                key = (binding["type"], bind_op["name"])
+                soap_action_map.setdefault(key, []).append(bind_op["soapAction"])
+    return soap_action_map
+
+
+# テキスト出力の区切り線
+_TEXT_RULE = "=" * 80
+
+
 def format_text_output(data: Dict[str, Any]) -> str:
     """テキスト形式で整形して出力"""
-    output = []
-    output.append("=" * 80)
-    output.append("WSDL解析結果")
-    output.append("=" * 80)
-    output.append(f"\nターゲット名前空間: {data['target_namespace']}\n")
+    soap_action_map = _build_soap_action_map(data)
+
+    # 1つのバッファに順に書き込む（行のリストを作ってから結合しない）
+    buf = io.StringIO()
+    w = buf.write
+    w(f"{_TEXT_RULE}\nWSDL解析結果\n{_TEXT_RULE}\n")
+    w(f"\nターゲット名前空間: {data['target_namespace']}\n\n")
 
     # サービス情報
-    output.append("\n" + "=" * 80)
-    output.append("📡 サービス情報")
-    output.append("=" * 80)
+    w(f"\n{_TEXT_RULE}\n📡 サービス情報\n{_TEXT_RULE}\n")
     for service in data["services"]:
-        output.append(f"\n【サービス名】 {service['name']}")
+        w(f"\n【サービス名】 {service['name']}\n")
         for port in service["ports"]:
-            output.append(f"  ├─ ポート: {port['name']}")
-            output.append(f"  │  ├─ バインディング: {port['binding']}")
-            output.append(f"  │  └─ エンドポイント: {port['address']}")
+            w(
+                f"  ├─ ポート: {port['name']}\n"
+                f"  │  ├─ バインディング: {port['binding']}\n"
+                f"  │  └─ エンドポイント: {port['address']}\n"
+            )
 
     # オペレーション一覧
-    output.append("\n" + "=" * 80)
-    output.append("🔧 オペレーション一覧")
-    output.append("=" * 80)
+    w(f"\n{_TEXT_RULE}\n🔧 オペレーション一覧\n{_TEXT_RULE}\n")
     for pt in data["port_types"]:
-        output.append(f"\n【ポートタイプ】 {pt['name']}")
+        w(f"\n【ポートタイプ】 {pt['name']}\n")
         for op in pt["operations"]:
-            output.append(f"\n  ● {op['name']}")
+            w(f"\n  ● {op['name']}\n")
             if op["documentation"]:
-                output.append(f"    説明: {op['documentation']}")
-            output.append(f"    入力: {op['input']}")
-            output.append(f"    出力: {op['output']}")
+                w(f"    説明: {op['documentation']}\n")
+            w(f"    入力: {op['input']}\n    出力: {op['output']}\n")
 
             # SOAPActionを探す
-            for binding in data["bindings"]:
-                if binding["type"] == pt["name"]:
-                    for bind_op in binding["operations"]:
-                        if bind_op["name"] == op["name"] and bind_op["soapAction"]:
-                            output.append(f"    SOAPAction: {bind_op['soapAction']}")
+            for soap_action in soap_action_map.get((pt["name"], op["name"]), ()):
+                w(f"    SOAPAction: {soap_action}\n")
 
     # メッセージ定義
-    output.append("\n" + "=" * 80)
-    output.append("📨 メッセージ定義")
-    output.append("=" * 80)
+    w(f"\n{_TEXT_RULE}\n📨 メッセージ定義\n{_TEXT_RULE}\n")
     for msg in data["messages"]:
-        output.append(f"\n【メッセージ】 {msg['name']}")
+        w(f"\n【メッセージ】 {msg['name']}\n")
         for part in msg["parts"]:
             if part["element"]:
-                output.append(f"  ├─ {part['name']} (element: {part['element']})")
+                w(f"  ├─ {part['name']} (element: {part['element']})\n")
             elif part["type"]:
-                output.append(f"  ├─ {part['name']} (type: {part['type']})")
+                w(f"  ├─ {part['name']} (type: {part['type']})\n")
 
     # データ型定義
     if data["types"]:
-        output.append("\n" + "=" * 80)
-        output.append("📋 データ型定義")
-        output.append("=" * 80)
+        w(f"\n{_TEXT_RULE}\n📋 データ型定義\n{_TEXT_RULE}\n")
         for dtype in data["types"]:
             if dtype["type"] == "complexType":
-                output.append(f"\n【複合型】 {dtype['name']}")
+                w(f"\n【複合型】 {dtype['name']}\n")
                 # 型自体のドキュメント
                 if dtype.get("documentation"):
-                    output.append(f"    説明: {dtype['documentation']}")
-                for elem in dtype["elements"]:
-                    occurs = f"[{elem['minOccurs']}..{elem['maxOccurs']}]"
-                    nillable = " (nullable)" if elem["nillable"] == "true" else ""
-                    doc_text = (
-                        f" - {elem['documentation']}"
-                        if elem.get("documentation")
-                        else ""
-                    )
-                    output.append(
-                        f"  ├─ {elem['name']}: {elem['type']} {occurs}{nillable}{doc_text}"
+                    w(f"    説明: {dtype['documentation']}\n")
+                for name, type_, min_occurs, max_occurs, nil, doc in _iter_element_rows(
+                    dtype["elements"]
+                ):
+                    nillable = " (nullable)" if nil == "true" else ""
+                    doc_text = f" - {doc}" if doc else ""
+                    w(
+                        f"  ├─ {name}: {type_} [{min_occurs}..{max_occurs}]"
+                        f"{nillable}{doc_text}\n"
                     )
             else:
                 doc_text = (
@@ -442,186 +616,198 @@ def format_text_output(data: Dict[str, Any]) -> str:
                     if dtype.get("documentation")
                     else ""
                 )
-                output.append(
-                    f"\n【要素】 {dtype['name']} : {dtype['dataType']}{doc_text}"
-                )
+                w(f"\n【要素】 {dtype['name']} : {dtype['dataType']}{doc_text}\n")
 
-    output.append("\n" + "=" * 80)
-    return "\n".join(output)
+    # 最後の区切り線の後には改行を付けない
+    w(f"\n{_TEXT_RULE}")
+    return buf.getvalue()
 
 
+def _escape_html(value: Any) -> str:
+    """HTMLに埋め込む値をエスケープする（値が無い場合は空文字列）"""
+    if value is None:
+        return ""
+    return escape(str(value))
+
+
+# アンカーIDに使えない文字の置換テーブル
+_ANCHOR_TRANS = str.maketrans({":": "_", " ": "_", ".": "_"})
+
+
+@lru_cache(maxsize=None)
 def _make_anchor_id(prefix: str, name: str) -> str:
     """HTML用のアンカーIDを生成する（スペースや特殊文字を置換）"""
     # 名前空間プレフィックスがあれば削除し、安全なIDを生成
-    safe_name = name.replace(":", "_").replace(" ", "_").replace(".", "_")
-    return f"{prefix}_{safe_name}"
+    return f"{prefix}_{name.translate(_ANCHOR_TRANS)}"
 
 
-def _make_link_if_exists(
-    name: str, targets: set, prefix: str, display_text: str | None = None
-) -> str:
-    """ターゲットが存在する場合はリンクを、存在しない場合はプレーンテキストを返す"""
-    # 表示するテキストを決定（display_text > name > 空文字列）
-    text = display_text if display_text else (name if name else "")
-    if name and name in targets:
-        anchor_id = _make_anchor_id(prefix, name)
-        return f'<a href="#{anchor_id}" class="ref-link">{text}</a>'
-    # リンク対象でなくても、テキストは必ず返す
-    return text
+def _make_link_prefixes(targets: set, prefix: str) -> Dict[str, str]:
+    """リンク対象の名前から、リンクの開始タグを引く辞書を作成する
 
+    参照ごとにアンカーIDを組み立てずに済むよう、リンク対象ごとに1回だけ作成する。
+    """
+    return {
+        name: f'<a href="#{_escape_html(_make_anchor_id(prefix, name))}" class="ref-link">'
+        for name in targets
+        if name
+    }
 
-def generate_html_output(data: Dict[str, Any]) -> str:
-    """HTML形式で出力"""
-    # リンク対象となる要素名のセットを事前に収集
-    message_names: set = {msg["name"] for msg in data["messages"]}
-    type_names: set = set()
-    for dtype in data["types"]:
-        if dtype.get("name"):
-            type_names.add(dtype["name"])
 
-    html = f"""<!DOCTYPE html>
+def _make_link_if_exists(name: str, link_prefixes: Dict[str, str]) -> str:
+    """ターゲットが存在する場合はリンクを、存在しない場合はプレーンテキストを返す"""
+    link_prefix = link_prefixes.get(name)
+    if link_prefix is None:
+        # リンク対象でなくても、テキストは必ず返す
+        return _escape_html(name)
+    return f"{link_prefix}{_escape_html(name)}</a>"
+
+
+# HTMLのヘッダー部分（スタイルと目次）。ターゲット名前空間の前後で分けて保持する
+# （f-stringにするとCSSの波括弧のエスケープが必要になり、呼び出しごとに組み立て直される）
+_HTML_HEAD_BEFORE_NS = """<!DOCTYPE html>
 <html lang="ja">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>WSDL解析結果</title>
     <style>
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             margin: 0;
             padding: 20px;
-        }}
-        .container {{
+        }
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             background: white;
             border-radius: 10px;
             box-shadow: 0 10px 40px rgba(0,0,0,0.3);
             padding: 40px;
-        }}
-        h1 {{
+        }
+        h1 {
             color: #667eea;
             border-bottom: 3px solid #667eea;
             padding-bottom: 10px;
-        }}
-        h2 {{
+        }
+        h2 {
             color: #764ba2;
             margin-top: 30px;
             padding: 10px;
             background: #f0f0f0;
             border-left: 5px solid #667eea;
-        }}
-        h3 {{
+        }
+        h3 {
             color: #555;
             margin-top: 20px;
-        }}
-        .section {{
+        }
+        .section {
             margin-bottom: 30px;
-        }}
-        .service, .operation, .message, .type {{
+        }
+        .service, .operation, .message, .type {
             background: #f9f9f9;
             border: 1px solid #ddd;
             border-radius: 5px;
             padding: 15px;
             margin: 10px 0;
-        }}
-        .operation {{
+        }
+        .operation {
             background: #e8f4f8;
-        }}
-        .label {{
+        }
+        .label {
             font-weight: bold;
             color: #667eea;
-        }}
-        .value {{
+        }
+        .value {
             color: #333;
             margin-left: 10px;
-        }}
-        .endpoint {{
+        }
+        .endpoint {
             word-break: break-all;
             color: #0066cc;
-        }}
-        table {{
+        }
+        table {
             width: 100%;
             border-collapse: collapse;
             margin: 10px 0;
-        }}
-        th, td {{
+        }
+        th, td {
             padding: 8px;
             text-align: left;
             border-bottom: 1px solid #ddd;
-        }}
-        th {{
+        }
+        th {
             background-color: #667eea;
             color: white;
-        }}
-        .badge {{
+        }
+        .badge {
             display: inline-block;
             padding: 3px 8px;
             border-radius: 3px;
             font-size: 0.85em;
             margin: 2px;
-        }}
-        .badge-input {{
+        }
+        .badge-input {
             background: #4caf50;
             color: white;
-        }}
-        .badge-output {{
+        }
+        .badge-output {
             background: #2196f3;
             color: white;
-        }}
+        }
         /* リンク用スタイル */
-        .ref-link {{
+        .ref-link {
             color: #0066cc;
             text-decoration: none;
             border-bottom: 1px dashed #0066cc;
             transition: all 0.2s ease;
-        }}
-        .ref-link:hover {{
+        }
+        .ref-link:hover {
             color: #004499;
             border-bottom-style: solid;
             background-color: #e8f4f8;
-        }}
+        }
         /* アンカーターゲットのハイライト */
-        :target {{
+        :target {
             animation: highlight 2s ease;
-        }}
-        @keyframes highlight {{
-            0% {{ background-color: #ffeb3b; }}
-            100% {{ background-color: transparent; }}
-        }}
+        }
+        @keyframes highlight {
+            0% { background-color: #ffeb3b; }
+            100% { background-color: transparent; }
+        }
         /* 目次用スタイル */
-        .toc {{
+        .toc {
             background: #f5f5f5;
             border: 1px solid #ddd;
             border-radius: 5px;
             padding: 15px;
             margin-bottom: 20px;
-        }}
-        .toc h3 {{
+        }
+        .toc h3 {
             margin-top: 0;
             color: #667eea;
-        }}
-        .toc ul {{
+        }
+        .toc ul {
             list-style-type: none;
             padding-left: 0;
-        }}
-        .toc li {{
+        }
+        .toc li {
             margin: 5px 0;
-        }}
-        .toc a {{
+        }
+        .toc a {
             color: #667eea;
             text-decoration: none;
-        }}
-        .toc a:hover {{
+        }
+        .toc a:hover {
             text-decoration: underline;
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="container">
         <h1>📄 WSDL解析結果</h1>
-        <p><span class="label">ターゲット名前空間:</span> <span class="value">{data['target_namespace']}</span></p>
+        <p><span class="label">ターゲット名前空間:</span> <span class="value">"""
+_HTML_HEAD_AFTER_NS = """</span></p>
 
         <div class="toc">
             <h3>📑 目次</h3>
@@ -634,49 +820,68 @@ def generate_html_output(data: Dict[str, Any]) -> str:
         </div>
 """
 
+
+def generate_html_output(data: Dict[str, Any]) -> str:
+    """HTML形式で出力"""
+    # リンク対象となる要素名のセットを事前に収集
+    message_names: set = {msg["name"] for msg in data["messages"]}
+    type_names: set = set()
+    for dtype in data["types"]:
+        if dtype.get("name"):
+            type_names.add(dtype["name"])
+    msg_link_prefixes = _make_link_prefixes(message_names, "msg")
+    type_link_prefixes = _make_link_prefixes(type_names, "type")
+    soap_action_map = _build_soap_action_map(data)
+
+    # 断片をリストに追加し、最後に1回だけ結合する（文字列の連結を繰り返すと毎回コピーが発生する）
+    parts = [
+        _HTML_HEAD_BEFORE_NS,
+        _escape_html(data["target_namespace"]),
+        _HTML_HEAD_AFTER_NS,
+    ]
+
     # サービス情報
-    html += '<div class="section" id="section-services"><h2>📡 サービス情報</h2>'
+    parts.append('<div class="section" id="section-services"><h2>📡 サービス情報</h2>')
     for service in data["services"]:
-        html += f'<div class="service"><h3>{service["name"]}</h3>'
+        parts.append(f'<div class="service"><h3>{_escape_html(service["name"])}</h3>')
         for port in service["ports"]:
-            html += f"""
-                <p><span class="label">ポート名:</span> <span class="value">{port["name"]}</span></p>
-                <p><span class="label">バインディング:</span> <span class="value">{port["binding"]}</span></p>
-                <p><span class="label">エンドポイント:</span> <span class="value endpoint">{port["address"]}</span></p>
-            """
-        html += "</div>"
-    html += "</div>"
+            parts.append(f"""
+                <p><span class="label">ポート名:</span> <span class="value">{_escape_html(port["name"])}</span></p>
+                <p><span class="label">バインディング:</span> <span class="value">{_escape_html(port["binding"])}</span></p>
+                <p><span class="label">エンドポイント:</span> <span class="value endpoint">{_escape_html(port["address"])}</span></p>
+            """)
+        parts.append("</div>")
+    parts.append("</div>")
 
     # オペレーション一覧
-    html += (
+    parts.append(
         '<div class="section" id="section-operations"><h2>🔧 オペレーション一覧</h2>'
     )
     for pt in data["port_types"]:
-        html += f'<h3>{pt["name"]}</h3>'
+        parts.append(f'<h3>{_escape_html(pt["name"])}</h3>')
         for op in pt["operations"]:
-            soap_action = ""
-            for binding in data["bindings"]:
-                if binding["type"] == pt["name"]:
-                    for bind_op in binding["operations"]:
-                        if bind_op["name"] == op["name"] and bind_op["soapAction"]:
-                            soap_action = bind_op["soapAction"]
+            # 複数のバインディングで定義されている場合は最後のSOAPActionを表示する
+            soap_actions = soap_action_map.get((pt["name"], op["name"]))
+            soap_action = soap_actions[-1] if soap_actions else ""
 
             doc_html = (
-                f"<p><i>{op['documentation']}</i></p>" if op["documentation"] else ""
+                f"<p><i>{_escape_html(op['documentation'])}</i></p>"
+                if op["documentation"]
+                else ""
             )
             soap_html = (
-                f"<p><span class='label'>SOAPAction:</span> <span class='value'>{soap_action}</span></p>"
+                f"<p><span class='label'>SOAPAction:</span> <span class='value'>{_escape_html(soap_action)}</span></p>"
                 if soap_action
                 else ""
             )
 
             # 入力/出力メッセージへのリンクを生成
-            input_link = _make_link_if_exists(op["input"], message_names, "msg")
-            output_link = _make_link_if_exists(op["output"], message_names, "msg")
+            input_link = _make_link_if_exists(op["input"], msg_link_prefixes)
+            output_link = _make_link_if_exists(op["output"], msg_link_prefixes)
 
-            html += f"""
+            parts.append(f"""
                 <div class="operation">
-                    <h4>{op["name"]}</h4>
+                    <h4>{_escape_html(op["name"])}</h4>
                     {doc_html}
                     <p>
                         <span class="badge badge-input">入力</span> {input_link}
@@ -684,62 +889,125 @@ def generate_html_output(data: Dict[str, Any]) -> str:
                     </p>
                     {soap_html}
                 </div>
-            """
-    html += "</div>"
+            """)
+    parts.append("</div>")
 
     # メッセージ定義
-    html += '<div class="section" id="section-messages"><h2>📨 メッセージ定義</h2>'
+    parts.append(
+        '<div class="section" id="section-messages"><h2>📨 メッセージ定義</h2>'
+    )
     for msg in data["messages"]:
         anchor_id = _make_anchor_id("msg", msg["name"])
-        html += f'<div class="message" id="{anchor_id}"><h4>{msg["name"]}</h4><table>'
-        html += "<tr><th>パラメータ名</th><th>要素/型</th></tr>"
+        parts.append(
+            f'<div class="message" id="{_escape_html(anchor_id)}"><h4>{_escape_html(msg["name"])}</h4><table>'
+        )
+        parts.append("<tr><th>パラメータ名</th><th>要素/型</th></tr>")
         for part in msg["parts"]:
             if part["element"]:
                 # element参照 → データ型へのリンク
-                elem_link = _make_link_if_exists(part["element"], type_names, "type")
+                elem_link = _make_link_if_exists(part["element"], type_link_prefixes)
                 elem_or_type = f"element: {elem_link}"
             else:
                 # type参照 → データ型へのリンク
-                type_link = _make_link_if_exists(part["type"], type_names, "type")
+                type_link = _make_link_if_exists(part["type"], type_link_prefixes)
                 elem_or_type = f"type: {type_link}"
-            html += f'<tr><td>{part["name"]}</td><td>{elem_or_type}</td></tr>'
-        html += "</table></div>"
-    html += "</div>"
+            parts.append(
+                f'<tr><td>{_escape_html(part["name"])}</td><td>{elem_or_type}</td></tr>'
+            )
+        parts.append("</table></div>")
+    parts.append("</div>")
 
     # データ型定義
     if data["types"]:
-        html += '<div class="section" id="section-types"><h2>📋 データ型定義</h2>'
+        parts.append('<div class="section" id="section-types"><h2>📋 データ型定義</h2>')
         for dtype in data["types"]:
             if dtype["type"] == "complexType":
                 anchor_id = _make_anchor_id("type", dtype["name"])
-                html += f'<div class="type" id="{anchor_id}"><h4>{dtype["name"]}</h4>'
+                parts.append(
+                    f'<div class="type" id="{_escape_html(anchor_id)}"><h4>{_escape_html(dtype["name"])}</h4>'
+                )
                 # 型自体のドキュメント
                 if dtype.get("documentation"):
-                    html += f'<p><i>{dtype["documentation"]}</i></p>'
-                html += "<table>"
-                html += "<tr><th>フィールド名</th><th>型</th><th>出現回数</th><th>Nullable</th><th>説明</th></tr>"
-                for elem in dtype["elements"]:
-                    occurs = f"{elem['minOccurs']}..{elem['maxOccurs']}"
-                    nillable = "✓" if elem["nillable"] == "true" else ""
-                    doc = elem.get("documentation", "")
+                    parts.append(
+                        f'<p><i>{_escape_html(dtype["documentation"])}</i></p>'
+                    )
+                parts.append("<table>")
+                parts.append(
+                    "<tr><th>フィールド名</th><th>型</th><th>出現回数</th><th>Nullable</th><th>説明</th></tr>"
+                )
+                for name, type_, min_occurs, max_occurs, nil, doc in _iter_element_rows(
+                    dtype["elements"]
+                ):
+                    occurs = f"{min_occurs}..{max_occurs}"
+                    nillable = "✓" if nil == "true" else ""
                     # フィールドの型にもリンクを付ける（他のcomplexTypeを参照している場合）
-                    type_link = _make_link_if_exists(elem["type"], type_names, "type")
-                    html += f'<tr><td>{elem["name"]}</td><td>{type_link}</td><td>{occurs}</td><td>{nillable}</td><td>{doc}</td></tr>'
-                html += "</table></div>"
+                    type_link = _make_link_if_exists(type_, type_link_prefixes)
+                    parts.append(
+                        f"<tr><td>{_escape_html(name)}</td><td>{type_link}</td><td>{_escape_html(occurs)}</td><td>{nillable}</td><td>{_escape_html(doc)}</td></tr>"
+                    )
+                parts.append("</table></div>")
             else:
                 # element型の場合
                 anchor_id = _make_anchor_id("type", dtype["name"])
                 data_type = dtype.get("dataType", "")
-                type_link = _make_link_if_exists(data_type, type_names, "type")
-                html += f'<div class="type" id="{anchor_id}"><h4>{dtype["name"]}</h4>'
+                type_link = _make_link_if_exists(data_type, type_link_prefixes)
+                parts.append(
+                    f'<div class="type" id="{_escape_html(anchor_id)}"><h4>{_escape_html(dtype["name"])}</h4>'
+                )
                 # 要素のドキュメント
                 if dtype.get("documentation"):
-                    html += f'<p><i>{dtype["documentation"]}</i></p>'
-                html += f'<p><span class="label">データ型:</span> {type_link}</p></div>'
-    html += "</div>"
+                    parts.append(
+                        f'<p><i>{_escape_html(dtype["documentation"])}</i></p>'
+                    )
+                parts.append(
+                    f'<p><span class="label">データ型:</span> {type_link}</p></div>'
+                )
+    parts.append("</div>")
+
+    parts.append("</div></body></html>")
+    return "".join(parts)
+
+
+def _dumps_json(obj: Any, indent: bool) -> str:
+    """JSON文字列に変換する（orjsonがあれば使用する）"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option).decode("utf-8")
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _type_to_json(dtype: Dict[str, Any]) -> Dict[str, Any]:
+    """データ型定義をJSON出力用に変換する
+
+    列ごとに保持しているcomplexTypeのフィールドを、他の定義と同じく
+    フィールドごとのオブジェクトの配列にする。
+    """
+    if "elements" not in dtype:
+        return dtype
+    elements = [
+        dict(zip(_ELEMENT_COLUMNS, row))
+        for row in _iter_element_rows(dtype["elements"])
+    ]
+    return {**dtype, "elements": elements}
+
+
+def format_json_output(data: Dict[str, Any]) -> str:
+    """JSON形式で出力"""
+    data = {**data, "types": [_type_to_json(dtype) for dtype in data["types"]]}
+    return _dumps_json(data, indent=True)
+
 
-    html += "</div></body></html>"
-    return html
+def format_ndjson_output(data: Dict[str, Any]) -> str:
+    """ND-JSON形式（1行に1つの定義）で出力"""
+    lines = [_dumps_json({"target_namespace": data["target_namespace"]}, False)]
+    for section in ("services", "bindings", "port_types", "messages", "types"):
+        for item in data[section]:
+            if section == "types":
+                item = _type_to_json(item)
+            lines.append(_dumps_json({"section": section, "data": item}, False))
+    return "\n".join(lines)
 
 
 def main():
@@ -752,6 +1020,7 @@ def main():
   python wsdl_parser.py http://example.com/service?wsdl
   python wsdl_parser.py service.wsdl --output result.html
   python wsdl_parser.py service.wsdl --format html --output result.html
+  python wsdl_parser.py service.wsdl --format json --output result.json
         """,
     )
     parser.add_argument("wsdl", help="WSDLファイルのパスまたはURL")
@@ -761,9 +1030,9 @@ def main():
     parser.add_argument(
         "--format",
         "-f",
-        choices=["text", "html"],
+        choices=["text", "html", "json", "ndjson"],
         default="text",
-        help="出力形式 (text または html、デフォルト: text)",
+        help="出力形式 (text, html, json または ndjson、デフォルト: text)",
     )
 
     args = parser.parse_args()
@@ -778,6 +1047,10 @@ def main():
     # 出力形式に応じて整形
     if args.format == "html":
         output_text = generate_html_output(data)
+    elif args.format == "json":
+        output_text = format_json_output(data)
+    elif args.format == "ndjson":
+        output_text = format_ndjson_output(data)
     else:
         output_text = format_text_output(data)
 
@@ -785,7 +1058,7 @@ def main():
     if args.output:
         output_path = Path(args.output)
         output_path.write_text(output_text, encoding="utf-8")
-        print(f"✓ 結果を {args.output} に保存しました")
+        print(f"✓ 結果を {args.output} に保存しました", file=sys.stderr)
     else:
         print(output_text)
 